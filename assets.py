@@ -0,0 +1,81 @@
+"""
+Фоновая загрузка ассетов: файлы декодируются в отдельном потоке, а игра
+до их готовности пользуется заглушками. Грузится только то, что запрошено.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import arcade
+
+
+class AssetLoader:
+    """
+    Очередь загрузок в фоновом потоке.
+    texture() / sound() сразу возвращаются; on_ready(результат) вызывается
+    позже из poll() — то есть в главном потоке, где можно трогать GL.
+    Готовые текстуры сразу кладутся в атлас, чтобы первый кадр с ними не ждал.
+    """
+
+    def __init__(self, atlas=None, workers=1):
+        self.atlas = atlas
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="assets")
+        self._pending = []
+        # суммарное время декодирования в фоне, для --profile-startup
+        self.decode_time = 0.0
+
+    def texture(self, path, on_ready):
+        self._submit(arcade.load_texture, (path,), on_ready, is_texture=True)
+
+    def sound(self, manager, name, path, on_ready=None, **kwargs):
+        """Декодировать звук в SoundManager под именем name."""
+        self._submit(manager.load, (name, path), on_ready, **kwargs)
+
+    def _submit(self, load, args, on_ready, is_texture=False, **kwargs):
+        future = self._pool.submit(self._timed, load, args, kwargs)
+        self._pending.append((future, on_ready, is_texture))
+
+    def _timed(self, load, args, kwargs):
+        started = time.perf_counter()
+        try:
+            return load(*args, **kwargs)
+        finally:
+            self.decode_time += time.perf_counter() - started
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def poll(self):
+        """Отдать готовые ассеты. Вызывать каждый кадр из главного потока."""
+        if not self._pending:
+            return
+        still = []
+        for future, on_ready, is_texture in self._pending:
+            if not future.done():
+                still.append((future, on_ready, is_texture))
+                continue
+            try:
+                result = future.result()
+            except Exception as e:
+                print("Ассет не загружен:", e)
+                continue
+            if is_texture and self.atlas is not None:
+                self.atlas.add(result)
+            if on_ready:
+                on_ready(result)
+        self._pending = still
+
+    def wait(self, timeout=None):
+        """Дождаться всех загрузок и отдать их (для тестов и профилирования)."""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        for future, _, _ in list(self._pending):
+            left = None if deadline is None else max(0.0, deadline - time.perf_counter())
+            try:
+                future.result(left)
+            except Exception:
+                pass
+        self.poll()
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,77 @@
+"""
+Звук с ограниченной ценой: фиксированный набор голосов (pyglet Player),
+заранее декодированные звуки и ограничение частоты для каждого звука.
+"""
+
+import math
+import time
+
+import arcade
+from pyglet import media
+
+
+class Voice:
+    __slots__ = ("player", "ends_at")
+
+    def __init__(self):
+        self.player = media.Player()
+        self.ends_at = 0.0
+
+
+class SoundManager:
+    """
+    Проигрывает звуки на max_voices заранее созданных плеерах.
+    Новые плееры в игре не создаются: свободный голос переиспользуется,
+    а если заняты все — забирается тот, что доиграет раньше всех.
+    Каждый звук звучит не чаще раза в min_interval секунд, остальные
+    запросы молча отбрасываются — сколько бы отскоков ни было за кадр.
+    """
+
+    def __init__(self, max_voices=8, clock=time.perf_counter):
+        self.clock = clock
+        self.voices = [Voice() for _ in range(max_voices)]
+        self._sounds = {}
+        self._last_played = {}
+
+    def load(self, name, path, min_interval=0.05):
+        """Загрузить и декодировать звук целиком. Без файла звук просто не играет."""
+        try:
+            sound = arcade.load_sound(path, streaming=False)
+        except Exception as e:
+            print("Звук не загружен:", e)
+            return False
+        self._sounds[name] = (sound.source, sound.get_length(), min_interval)
+        return True
+
+    def play(self, name, volume=1.0):
+        """Сыграть звук name. True, если он действительно зазвучал."""
+        entry = self._sounds.get(name)
+        if entry is None:
+            return False
+        source, length, min_interval = entry
+
+        now = self.clock()
+        if now - self._last_played.get(name, -math.inf) < min_interval:
+            return False
+        self._last_played[name] = now
+
+        voice = min(self.voices, key=lambda v: v.ends_at)
+        player = voice.player
+        if voice.ends_at > now:
+            # голос ещё звучит — обрываем его
+            player.pause()
+        if player.source is not None:
+            player.next_source()
+
+        player.volume = volume
+        player.queue(source)
+        player.play()
+        voice.ends_at = now + length
+        return True
+
+    def close(self):
+        """Остановить и освободить все голоса."""
+        for voice in self.voices:
+            voice.player.pause()
+            voice.player.delete()
+        self.voices = []
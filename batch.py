@@ -0,0 +1,223 @@
+"""
+Пакетная симуляция: N пуль шагают одновременно на массивах NumPy.
+Правила те же, что в physics.move_bullet, результат совпадает с поштучным Simulation.
+"""
+
+import math
+from collections import namedtuple
+
+import numpy as np
+
+from physics import BULLET_RADIUS, BULLET_SPEED
+from spatial import WallIndex
+
+
+BatchResult = namedtuple("BatchResult", "reached bounces frames")
+
+
+def angle_directions(n):
+    """n единичных направлений, равномерно по кругу; форма (n, 2)."""
+    angles = np.arange(n) * (2 * math.pi / n)
+    return np.column_stack((np.cos(angles), np.sin(angles)))
+
+
+class BatchSimulator:
+    """
+    Лабиринт, подготовленный для пакетного шага.
+    Для каждой клетки заранее собран список стен её окрестности (в исходном порядке),
+    поэтому пуля на шаге проверяет только K ближайших стен, а не все.
+    max_speed - наибольшая скорость пуль, от неё зависит размер окрестности
+    """
+
+    def __init__(self, walls, cell, cols, rows, radius=BULLET_RADIUS, max_speed=BULLET_SPEED):
+        self.index = WallIndex(walls, cell, cols, rows)
+        self.cell = cell
+        self.radius = radius
+
+        walls = self.index.walls
+        # последняя "стена" — заглушка далеко за лабиринтом для выравнивания строк
+        far = -1e9
+        self.left = np.array([w[0] for w in walls] + [far], dtype=np.float64)
+        self.bottom = np.array([w[1] for w in walls] + [far], dtype=np.float64)
+        self.right = np.array([w[0] + w[2] for w in walls] + [far], dtype=np.float64)
+        self.top = np.array([w[1] + w[3] for w in walls] + [far], dtype=np.float64)
+
+        # путь за шаг плюс радиус и запас на выталкивание из стен
+        self.table = self._build_table(math.ceil((max_speed + 4 * radius) / cell))
+
+    def _build_table(self, margin):
+        index = self.index
+        cols, rows = index.cols, index.rows
+        pad = len(index.walls)
+
+        blocks = []
+        for r in range(rows):
+            for c in range(cols):
+                found = set()
+                for rr in range(max(r - margin, 0), min(r + margin, rows - 1) + 1):
+                    base = rr * cols
+                    for cc in range(max(c - margin, 0), min(c + margin, cols - 1) + 1):
+                        found.update(index.cells[base + cc])
+                blocks.append(sorted(found))
+
+        width = max(1, max(len(b) for b in blocks))
+        table = np.full((len(blocks), width), pad, dtype=np.intp)
+        for i, ids in enumerate(blocks):
+            table[i, : len(ids)] = ids
+        return table
+
+    def step(self, x, y, dx, dy):
+        """
+        Один шаг для всех пуль; массивы x, y, dx, dy меняются на месте.
+        Возвращает число отражений каждой пули на этом шаге.
+        """
+        n = len(x)
+        radius = self.radius
+        index = self.index
+
+        c = np.clip((x // self.cell).astype(np.intp), 0, index.cols - 1)
+        r = np.clip((y // self.cell).astype(np.intp), 0, index.rows - 1)
+        cand = self.table[r * index.cols + c]
+        wl = self.left[cand]
+        wr = self.right[cand]
+        wb = self.bottom[cand]
+        wt = self.top[cand]
+
+        rows = np.arange(n)
+        tx = x + dx
+        ty = y + dy
+        x_col = x[:, None]
+        y_col = y[:, None]
+
+        # --- развертка по X ---
+        overlap_y = (y_col + radius > wb) & (y_col - radius < wt)
+        cx_pos = wl - radius
+        cx_neg = wr + radius
+        pos = (dx > 0)[:, None]
+        neg = (dx < 0)[:, None]
+        hit_pos = pos & overlap_y & (x_col < cx_pos) & (cx_pos <= tx[:, None])
+        hit_neg = neg & overlap_y & (tx[:, None] <= cx_neg) & (cx_neg < x_col)
+        dist = np.where(hit_pos, cx_pos - x_col, np.where(hit_neg, x_col - cx_neg, np.inf))
+        k = dist.argmin(axis=1)
+        hit_x = np.isfinite(dist[rows, k])
+        col_x = np.where(dx > 0, cx_pos[rows, k], cx_neg[rows, k])
+        new_x = np.where(hit_x, col_x, tx)
+        np.negative(dx, out=dx, where=hit_x)
+
+        # --- развертка по Y ---
+        nx_col = new_x[:, None]
+        overlap_x = (nx_col + radius > wl) & (nx_col - radius < wr)
+        cy_pos = wb - radius
+        cy_neg = wt + radius
+        pos = (dy > 0)[:, None]
+        neg = (dy < 0)[:, None]
+        hit_pos = pos & overlap_x & (y_col < cy_pos) & (cy_pos <= ty[:, None])
+        hit_neg = neg & overlap_x & (ty[:, None] <= cy_neg) & (cy_neg < y_col)
+        dist = np.where(hit_pos, cy_pos - y_col, np.where(hit_neg, y_col - cy_neg, np.inf))
+        k = dist.argmin(axis=1)
+        hit_y = np.isfinite(dist[rows, k])
+        col_y = np.where(dy > 0, cy_pos[rows, k], cy_neg[rows, k])
+        new_y = np.where(hit_y, col_y, ty)
+        np.negative(dy, out=dy, where=hit_y)
+
+        x[:] = new_x
+        y[:] = new_y
+
+        # --- выталкивание: редкий случай, поштучно и в том же порядке стен ---
+        nx_col = new_x[:, None]
+        ny_col = new_y[:, None]
+        inside = (
+            (nx_col + radius > wl)
+            & (nx_col - radius < wr)
+            & (ny_col + radius > wb)
+            & (ny_col - radius < wt)
+        )
+        for i in np.flatnonzero(inside.any(axis=1)):
+            self._push_out(i, cand[i], x, y, dx, dy)
+
+        return hit_x.astype(np.intp) + hit_y
+
+    def _push_out(self, i, ids, x, y, dx, dy):
+        radius = self.radius
+        new_x = float(x[i])
+        new_y = float(y[i])
+        bdx = float(dx[i])
+        bdy = float(dy[i])
+        for w in ids:
+            wall_left = self.left[w]
+            wall_right = self.right[w]
+            wall_bottom = self.bottom[w]
+            wall_top = self.top[w]
+            if (
+                new_x + radius > wall_left
+                and new_x - radius < wall_right
+                and new_y + radius > wall_bottom
+                and new_y - radius < wall_top
+            ):
+                overlap_left = abs((new_x + radius) - wall_left)
+                overlap_right = abs(wall_right - (new_x - radius))
+                overlap_bottom = abs((new_y + radius) - wall_bottom)
+                overlap_top = abs(wall_top - (new_y - radius))
+                min_overlap = min(overlap_left, overlap_right, overlap_bottom, overlap_top)
+                if min_overlap == overlap_left:
+                    new_x = wall_left - radius
+                    bdx = -abs(bdx)
+                elif min_overlap == overlap_right:
+                    new_x = wall_right + radius
+                    bdx = abs(bdx)
+                elif min_overlap == overlap_bottom:
+                    new_y = wall_bottom - radius
+                    bdy = -abs(bdy)
+                else:
+                    new_y = wall_top + radius
+                    bdy = abs(bdy)
+        x[i] = new_x
+        y[i] = new_y
+        dx[i] = bdx
+        dy[i] = bdy
+
+    def run(self, start_rect, end_rect, directions, speed=BULLET_SPEED, max_frames=3000):
+        """
+        Запустить по пуле на каждое направление из центра start_rect.
+        Возвращает BatchResult: reached (дошла до end_rect), bounces и frames.
+        Для недошедших frames = max_frames, для нулевого направления — 0.
+        """
+        sx, sy, sw, sh = start_rect
+        ex, ey, ew, eh = end_rect
+        n = len(directions)
+
+        # нормировка как в Simulation.launch, чтобы пути совпадали до бита
+        dx = np.zeros(n)
+        dy = np.zeros(n)
+        launched = np.zeros(n, dtype=bool)
+        for i, (ux, uy) in enumerate(directions):
+            length = math.hypot(ux, uy)
+            if length != 0:
+                dx[i] = ux / length * speed
+                dy[i] = uy / length * speed
+                launched[i] = True
+
+        reached = np.zeros(n, dtype=bool)
+        bounces = np.zeros(n, dtype=np.intp)
+        frames = np.where(launched, max_frames, 0)
+
+        active = np.flatnonzero(launched)
+        x = np.full(len(active), sx + sw / 2)
+        y = np.full(len(active), sy + sh / 2)
+        dx = dx[active]
+        dy = dy[active]
+
+        for frame in range(1, max_frames + 1):
+            if not len(active):
+                break
+            bounces[active] += self.step(x, y, dx, dy)
+
+            done = (ex <= x) & (x <= ex + ew) & (ey <= y) & (y <= ey + eh)
+            if done.any():
+                reached[active[done]] = True
+                frames[active[done]] = frame
+                keep = ~done
+                active = active[keep]
+                x, y, dx, dy = x[keep], y[keep], dx[keep], dy[keep]
+
+        return BatchResult(reached, bounces, frames)
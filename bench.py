@@ -0,0 +1,384 @@
+"""
+Замеры горячих путей игры без окна: генерация лабиринта, луч прицела,
+шаг физики, поле расстояний, частицы, сохранение и загрузка, отрисовка комнаты.
+
+    python bench.py                          # все размеры 12, 50, 200, 1000
+    python bench.py --sizes 12 50 --save-baseline
+    python bench.py --baseline bench_baseline.json --threshold 0.25
+    python bench.py --sizes 50 200 --sdf-resolutions 2.5 5 10 --no-draw
+    ARCADE_HEADLESS=1 python bench.py --frames 600 --frame-budget 128
+
+С --baseline выход с кодом 1, если какой-то замер стал медленнее порога.
+С --frames замеряется только память кадров самой игры: выход с кодом 1,
+если кадр в установившемся режиме оставляет больше --frame-budget байт.
+"""
+
+import argparse
+import gc
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from levelpack import MARKER_SIZE, room_rects
+from maze import Maze
+from particles import ParticlePool
+from physics import BULLET_SPEED, Simulation
+from raycast import AimRaycaster
+from saves import write_atomic
+from sdf import DistanceField
+
+
+CELL = 50
+WALL = 10
+
+SIZES = (12, 50, 200, 1000)
+SPEEDS = (BULLET_SPEED, 4 * BULLET_SPEED)
+MIN_TIME = 0.3
+BASELINE_FILE = "bench_baseline.json"
+SDF_RESOLUTIONS = (5.0,)
+# поле расстояний крупнее этого не строим: сетки на 1000 x 1000 клеток при шаге 5 — 400 МБ
+SDF_MAX_BYTES = 256 * 1024 * 1024
+# байт на кадр, которые может оставлять после себя установившийся кадр игры
+FRAME_BUDGET = 128
+FRAME_WARMUP = 180
+
+
+def measure(op, min_time=MIN_TIME, max_ops=1_000_000):
+    """
+    Вызывать op(), пока не наберётся min_time секунд (но хотя бы раз).
+    Возвращает (операций в секунду, пик памяти одной операции в байтах).
+    Память меряется отдельным вызовом под tracemalloc, чтобы он не портил время.
+    """
+    op()  # прогрев
+    ops = 0
+    started = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_time and ops < max_ops:
+        op()
+        ops += 1
+        elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    op()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return ops / elapsed, peak
+
+
+def room(size, seed=1, algorithm="dfs"):
+    maze = Maze.generate(size, size, CELL, WALL, seed=seed, algorithm=algorithm)
+    start, end = room_rects(size, size, CELL, WALL)
+    return maze, start, end
+
+
+def bench_generate(size, algorithm):
+    seeds = iter(range(10**9))
+
+    def op():
+        maze = Maze.generate(size, size, CELL, WALL, seed=next(seeds), algorithm=algorithm)
+        maze.vertical_rects()
+        maze.horizontal_rects()
+
+    return op
+
+
+def bench_raycast(sim, start):
+    raycaster = AimRaycaster(sim.index)
+    rnd = random.Random(0)
+    x, y = start[0] + start[2] / 2, start[1] + start[3] / 2
+    angles = [rnd.uniform(0, 2 * math.pi) for _ in range(1024)]
+    directions = [(math.cos(a), math.sin(a)) for a in angles]
+    i = 0
+
+    def op():
+        # trace() без кэша: каждый раз новый луч, как при движении мыши
+        nonlocal i
+        ux, uy = directions[i & 1023]
+        i += 1
+        raycaster.trace(x, y, ux, uy)
+
+    return op
+
+
+def bench_physics(sim, speed):
+    angle = 0.3
+
+    def op():
+        if sim.bullet is None:
+            sim.launch(math.cos(angle), math.sin(angle), speed=speed)
+        sim.step()
+
+    return op
+
+
+def bench_sdf(walls, width, resolution):
+    def op():
+        DistanceField(walls, width, width, resolution, CELL)
+
+    return op
+
+
+def bench_particles():
+    pool = ParticlePool(4096, rng=None)
+    x = y = 100.0
+
+    def op():
+        pool.emit(x, y, 2)
+        pool.update(1 / 60)
+
+    return op
+
+
+def bench_save(maze, start, path):
+    data = {
+        "format": 2,
+        "room_number": 7,
+        "level_time": 12.3,
+        "start_rect": start,
+        "bullet": {"x": 30.0, "y": 30.0, "dx": 7.0, "dy": 7.0, "radius": 5},
+        "cooldown": 0,
+        "last_shield_time": 0,
+        "shield_active": False,
+        "maze": maze.to_save(),
+    }
+
+    def save():
+        write_atomic(path, data)
+
+    def load():
+        with open(path, "r") as f:
+            loaded = json.load(f)
+        Maze.from_save(loaded["maze"], CELL, WALL)
+
+    return save, load
+
+
+def draw_window():
+    """Скрытое окно для замера отрисовки или None, если GL недоступен."""
+    try:
+        import arcade
+
+        return arcade.Window(800, 600, "bench", visible=False)
+    except Exception as e:
+        print("отрисовка пропущена:", e, file=sys.stderr)
+        return None
+
+
+def bench_draw(window, sim, start, end):
+    import arcade
+
+    from render import ParticleRenderer, RoomBatch
+
+    texture = arcade.make_soft_square_texture(MARKER_SIZE, arcade.color.GREEN, outer_alpha=255)
+    batch = RoomBatch(
+        sim.walls, start, end, texture, arcade.color.GRAY, arcade.color.RED, chunk=16 * CELL
+    )
+    # как в игре: рисуется только то, что видно в окне
+    view = (0, 0, *window.get_size())
+    particles = ParticlePool(4096)
+    for _ in range(200):
+        particles.emit(300.0, 300.0, 2)
+        particles.update(1 / 60)
+    renderer = ParticleRenderer(window.ctx, 4096)
+
+    def op():
+        window.clear()
+        batch.draw(view)
+        renderer.draw(particles)
+        # ждём GPU, иначе меряем только постановку команд в очередь
+        window.ctx.finish()
+
+    return op
+
+
+def frame_allocations(frames, warmup=FRAME_WARMUP, attempts=3):
+    """
+    Кадры GameWindow без окна под tracemalloc: пуля летит, курсор ходит по кругу
+    из 60 точек (кэши прицела прогреваются на разгоне).
+    Возвращает (байт на кадр в итоге, пик временной памяти кадра в байтах,
+    сборок мусора поколения 0). Если пуля дошла до финиша, смена комнаты
+    портит замер — тогда он повторяется, не больше attempts раз.
+    """
+    import arcade
+
+    import script
+
+    tmp = tempfile.mkdtemp(prefix="bench-")
+    # сохранение и записи комнат — во временную папку, а не к игроку
+    script.SAVE_FILE = os.path.join(tmp, "save.json")
+    script.REPLAY_FILE = os.path.join(tmp, "replays.jsonl")
+    window = script.GameWindow()
+    collections = [0]
+
+    def on_gc(phase, info):
+        if phase == "start" and info["generation"] == 0:
+            collections[0] += 1
+
+    try:
+        window.show_start_screen = False
+        window.paused = False
+        sx, sy = window.sim.start_point()
+        window.on_mouse_press(sx + 100, sy + 37, arcade.MOUSE_BUTTON_LEFT, 0)
+        cursor = [
+            (sx + 80 * math.cos(i * math.tau / 60), sy + 80 * math.sin(i * math.tau / 60))
+            for i in range(60)
+        ]
+
+        def frame(i):
+            window._mouse_x, window._mouse_y = cursor[i % 60]
+            window.on_update(1 / 60)
+            window.on_draw()
+
+        for _ in range(attempts):
+            for i in range(warmup):
+                frame(i)
+            room = window.room_number
+            gc.collect()
+            collections[0] = 0
+            gc.callbacks.append(on_gc)
+            tracemalloc.start()
+            started, _ = tracemalloc.get_traced_memory()
+            peak = 0
+            for i in range(frames):
+                before, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                frame(i)
+                peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+            gc.collect()
+            ended, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            gc.callbacks.remove(on_gc)
+            if window.room_number == room:
+                return (ended - started) / frames, peak, collections[0]
+            print("комната сменилась во время замера — повтор", file=sys.stderr)
+            if not window.bullet_active:
+                window.on_mouse_press(sx + 100, sy + 37, arcade.MOUSE_BUTTON_LEFT, 0)
+        return None
+    finally:
+        window.on_close()
+        window.close()
+        for name in os.listdir(tmp):
+            os.remove(os.path.join(tmp, name))
+        os.rmdir(tmp)
+
+
+def run(sizes, speeds, draw=True, min_time=MIN_TIME, sdf_resolutions=SDF_RESOLUTIONS):
+    results = {}
+
+    def record(name, op):
+        ops, peak = measure(op, min_time)
+        results[name] = {"ops": ops, "peak": peak}
+        print(f"{name:<32}{ops:14.1f} оп/с{peak / 1024:12.1f} КБ", flush=True)
+
+    window = draw_window() if draw else None
+    tmp = tempfile.mkdtemp(prefix="bench-")
+    try:
+        record("particles", bench_particles())
+        for size in sizes:
+            maze, start, end = room(size)
+            sim = Simulation(
+                maze.vertical_rects() + maze.horizontal_rects(), start, end, CELL, size, size
+            )
+
+            record(f"generate[dfs]/{size}", bench_generate(size, "dfs"))
+            record(f"generate[kruskal]/{size}", bench_generate(size, "kruskal"))
+            record(f"raycast/{size}", bench_raycast(sim, start))
+            for speed in speeds:
+                record(f"physics[v={speed:g}]/{size}", bench_physics(sim, speed))
+
+            width = size * CELL + WALL
+            for res in sdf_resolutions:
+                nbytes = 4 * (math.ceil(width / res) + 1) ** 2
+                if nbytes > SDF_MAX_BYTES:
+                    print(f"sdf[res={res:g}]/{size}: пропущено, сетка {nbytes >> 20} МБ")
+                    continue
+                record(f"sdf[res={res:g}]/{size}", bench_sdf(sim.walls, width, res))
+                field = DistanceField(sim.walls, width, width, res, CELL)
+                fast = Simulation(sim.walls, start, end, CELL, size, size, field=field)
+                for speed in speeds:
+                    record(f"physics[v={speed:g},sdf={res:g}]/{size}", bench_physics(fast, speed))
+            save, load = bench_save(maze, start, os.path.join(tmp, "save.json"))
+            record(f"save/{size}", save)
+            record(f"load/{size}", load)
+            if window is not None:
+                record(f"draw/{size}", bench_draw(window, sim, start, end))
+    finally:
+        for name in os.listdir(tmp):
+            os.remove(os.path.join(tmp, name))
+        os.rmdir(tmp)
+        if window is not None:
+            window.close()
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Замеры, которые медленнее базовых больше чем на threshold (доля)."""
+    slower = []
+    for name, base in baseline.items():
+        now = results.get(name)
+        if now is None:
+            continue
+        ratio = now["ops"] / base["ops"]
+        if ratio < 1 - threshold:
+            slower.append((name, ratio))
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замеры горячих путей игры")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--speeds", type=float, nargs="+", default=list(SPEEDS))
+    parser.add_argument("--min-time", type=float, default=MIN_TIME, help="секунд на замер")
+    parser.add_argument("--no-draw", action="store_true", help="без замера отрисовки")
+    parser.add_argument("--sdf-resolutions", type=float, nargs="*", default=list(SDF_RESOLUTIONS),
+                        help="шаги сетки поля расстояний, пикселей")
+    parser.add_argument("--baseline", help="сравнить с сохранёнными замерами")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="допустимое замедление, доля (0.25 = 25%%)")
+    parser.add_argument("--save-baseline", nargs="?", const=BASELINE_FILE,
+                        help="записать замеры как базовые")
+    parser.add_argument("--frames", type=int,
+                        help="только память кадров игры: столько кадров под tracemalloc")
+    parser.add_argument("--frame-budget", type=float, default=FRAME_BUDGET,
+                        help="допустимый прирост памяти за кадр, байт")
+    args = parser.parse_args()
+
+    if args.frames:
+        result = frame_allocations(args.frames)
+        if result is None:
+            print("не удалось замерить: пуля каждый раз доходила до финиша")
+            sys.exit(1)
+        per_frame, peak, collections = result
+        print(f"{args.frames} кадров: {per_frame:.1f} Б/кадр остаётся, "
+              f"пик внутри кадра {peak / 1024:.1f} КБ, сборок мусора {collections}")
+        if per_frame > args.frame_budget:
+            print(f"ПРЕВЫШЕНО: больше {args.frame_budget:g} Б/кадр")
+            sys.exit(1)
+        return
+
+    results = run(args.sizes, args.speeds, draw=not args.no_draw, min_time=args.min_time,
+                  sdf_resolutions=args.sdf_resolutions)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=1)
+        print("базовые замеры записаны в", args.save_baseline)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        slower = compare(results, baseline, args.threshold)
+        for name, ratio in slower:
+            print(f"МЕДЛЕННЕЕ: {name} — {ratio:.0%} от базового")
+        if slower:
+            sys.exit(1)
+        print("регрессий нет")
+
+
+if __name__ == "__main__":
+    main()
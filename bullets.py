@@ -0,0 +1,124 @@
+"""Рой пуль на параллельных массивах NumPy: веер выстрелов и деление при отскоке."""
+
+import math
+
+import numpy as np
+
+
+class BulletSwarm:
+    """
+    Пули фиксированной ёмкости, живые лежат в начале массивов [0:count].
+    Шагают все сразу через BatchSimulator.step — те же правила, что у одиночной пули.
+    max_frames - сколько шагов живёт пуля, чтобы рой не рос бесконечно
+    split_angle - при split_on_bounce пуля на отскоке делится на две,
+        разошедшиеся на этот угол (радианы); не больше max_splits раз за жизнь
+    """
+
+    def __init__(self, capacity=512, max_frames=900, split_on_bounce=False,
+                 split_angle=0.35, max_splits=2):
+        self.capacity = capacity
+        self.count = 0
+        self.max_frames = max_frames
+        self.split_on_bounce = split_on_bounce
+        self.split_angle = split_angle
+        self.max_splits = max_splits
+
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.dx = np.zeros(capacity)
+        self.dy = np.zeros(capacity)
+        self.age = np.zeros(capacity, dtype=np.int32)
+        self.splits = np.zeros(capacity, dtype=np.int8)
+        # положение до последнего шага — для интерполяции при отрисовке
+        self.prev_x = np.zeros(capacity)
+        self.prev_y = np.zeros(capacity)
+
+    def _arrays(self):
+        return (self.x, self.y, self.dx, self.dy, self.age, self.splits, self.prev_x, self.prev_y)
+
+    def spread(self, x, y, dir_x, dir_y, n, angle, speed):
+        """
+        Веер из n пуль из точки (x, y) вокруг направления (dir_x, dir_y),
+        общий раствор angle радиан. Возвращает, сколько пуль поместилось.
+        """
+        length = math.hypot(dir_x, dir_y)
+        n = min(n, self.capacity - self.count)
+        if length == 0 or n <= 0:
+            return 0
+        base = math.atan2(dir_y, dir_x)
+        offsets = np.linspace(-angle / 2, angle / 2, n) if n > 1 else np.zeros(1)
+        s = slice(self.count, self.count + n)
+        self.x[s] = x
+        self.y[s] = y
+        self.dx[s] = np.cos(base + offsets) * speed
+        self.dy[s] = np.sin(base + offsets) * speed
+        self.age[s] = 0
+        self.splits[s] = 0
+        self.prev_x[s] = x
+        self.prev_y[s] = y
+        self.count += n
+        return n
+
+    def step(self, sim, end_rect):
+        """
+        Один шаг всех пуль на BatchSimulator sim.
+        Возвращает (число отскоков за шаг, долетела ли хоть одна до end_rect).
+        Долетевшие и состарившиеся пули удаляются.
+        """
+        n = self.count
+        if n == 0:
+            return 0, False
+
+        x, y, dx, dy = self.x[:n], self.y[:n], self.dx[:n], self.dy[:n]
+        self.prev_x[:n] = x
+        self.prev_y[:n] = y
+        bounces = sim.step(x, y, dx, dy)
+        self.age[:n] += 1
+
+        ex, ey, ew, eh = end_rect
+        reached = (ex <= x) & (x <= ex + ew) & (ey <= y) & (y <= ey + eh)
+        dead = reached | (self.age[:n] >= self.max_frames)
+
+        if self.split_on_bounce:
+            self._split(np.flatnonzero((bounces > 0) & ~dead & (self.splits[:n] < self.max_splits)))
+
+        if dead.any():
+            # уплотняем живые пули в начало массивов
+            m = self.count
+            alive = np.ones(m, dtype=bool)
+            alive[:n] = ~dead
+            k = int(np.count_nonzero(alive))
+            for arr in self._arrays():
+                arr[:k] = arr[:m][alive]
+            self.count = k
+
+        return int(bounces.sum()), bool(reached.any())
+
+    def _split(self, idx):
+        free = self.capacity - self.count
+        if free <= 0 or not len(idx):
+            return
+        idx = idx[:free]
+        k = len(idx)
+        half = self.split_angle / 2
+        c, s = math.cos(half), math.sin(half)
+        dx = self.dx[idx]
+        dy = self.dy[idx]
+
+        # родитель поворачивает в одну сторону, потомок — в другую
+        t = slice(self.count, self.count + k)
+        for arr in self._arrays():
+            arr[t] = arr[idx]
+        self.dx[idx] = dx * c - dy * s
+        self.dy[idx] = dx * s + dy * c
+        self.dx[t] = dx * c + dy * s
+        self.dy[t] = -dx * s + dy * c
+        self.splits[idx] += 1
+        self.splits[t] = self.splits[idx]
+        self.count += k
+
+    def clear(self):
+        self.count = 0
+
+    def __len__(self):
+        return self.count
@@ -0,0 +1,70 @@
+"""Камера, которая плавно следует за пулей или прицелом и не выходит за лабиринт."""
+
+import math
+
+import arcade
+
+
+class FollowCamera:
+    """
+    Обёртка над arcade.Camera2D для области лабиринта на экране.
+    viewport - (left, bottom, width, height) области окна, куда рисуется мир
+    world_width, world_height - размер лабиринта в пикселях
+    speed - насколько быстро камера догоняет цель (1/с)
+    """
+
+    def __init__(self, viewport, world_width, world_height, speed=6.0):
+        left, bottom, width, height = viewport
+        self.camera = arcade.Camera2D(viewport=arcade.LBWH(left, bottom, width, height))
+        self.width = width
+        self.height = height
+        self.world_width = world_width
+        self.world_height = world_height
+        self.speed = speed
+        self.x, self.y = self._clamp(width / 2, height / 2)
+        self._apply()
+
+    def _clamp(self, x, y):
+        # лабиринт меньше окна — стоит по центру, больше — край не уезжает внутрь
+        if self.world_width <= self.width:
+            x = self.world_width / 2
+        else:
+            x = min(max(x, self.width / 2), self.world_width - self.width / 2)
+        if self.world_height <= self.height:
+            y = self.world_height / 2
+        else:
+            y = min(max(y, self.height / 2), self.world_height - self.height / 2)
+        return x, y
+
+    def _apply(self):
+        self.camera.position = (self.x, self.y)
+
+    def follow(self, x, y, dt):
+        """Сдвинуться к точке (x, y) за dt секунд."""
+        tx, ty = self._clamp(x, y)
+        k = 1 - math.exp(-self.speed * dt)
+        self.x += (tx - self.x) * k
+        self.y += (ty - self.y) * k
+        self._apply()
+
+    def jump(self, x, y):
+        """Сразу встать на точку (x, y) — при смене комнаты."""
+        self.x, self.y = self._clamp(x, y)
+        self._apply()
+
+    def view(self):
+        """Видимая часть мира (left, bottom, right, top)."""
+        return (
+            self.x - self.width / 2,
+            self.y - self.height / 2,
+            self.x + self.width / 2,
+            self.y + self.height / 2,
+        )
+
+    def to_world(self, screen_x, screen_y):
+        left, bottom, _, _ = self.view()
+        vp_left, vp_bottom = self.camera.viewport_left, self.camera.viewport_bottom
+        return left + screen_x - vp_left, bottom + screen_y - vp_bottom
+
+    def activate(self):
+        return self.camera.activate()
@@ -0,0 +1,160 @@
+"""
+Интерфейс в удерживаемом режиме: тексты и прямоугольники создаются один раз,
+а в кадре меняются только те, у которых поменялось значение.
+"""
+
+import arcade
+import pyglet
+
+
+class Button:
+    """
+    Прямоугольная кнопка с надписью.
+    rect - (x, y, w, h), левый нижний угол и размер
+    sprites / batch - куда добавить фон и надпись (рисует их владелец)
+    """
+
+    def __init__(self, rect, text, sprites, batch, color, hover_color, text_color, font_size=14):
+        x, y, w, h = rect
+        self.rect = rect
+        self.color = color
+        self.hover_color = hover_color
+        self.hovered = False
+
+        self.sprite = arcade.SpriteSolidColor(int(w), int(h), x + w / 2, y + h / 2, color)
+        sprites.append(self.sprite)
+        self.label = arcade.Text(
+            text,
+            x + w / 2,
+            y + h / 2,
+            text_color,
+            font_size,
+            anchor_x="center",
+            anchor_y="center",
+            batch=batch,
+        )
+
+    def contains(self, px, py):
+        x, y, w, h = self.rect
+        return x <= px <= x + w and y <= py <= y + h
+
+    def hover(self, mouse_x, mouse_y):
+        # подсветка только строго внутри, как было при рисовании каждый кадр
+        x, y, w, h = self.rect
+        hovered = x < mouse_x < x + w and y < mouse_y < y + h
+        if hovered != self.hovered:
+            self.hovered = hovered
+            self.sprite.color = self.hover_color if hovered else self.color
+
+    def set_text(self, text):
+        if text != self.label.text:
+            self.label.text = text
+
+
+class Panel:
+    """Набор прямоугольников, надписей и кнопок, который рисуется двумя вызовами."""
+
+    def __init__(self):
+        self.sprites = arcade.SpriteList()
+        self.batch = pyglet.graphics.Batch()
+        self.buttons = []
+
+    def add_rect(self, rect, color):
+        x, y, w, h = rect
+        sprite = arcade.SpriteSolidColor(int(w), int(h), x + w / 2, y + h / 2, color)
+        self.sprites.append(sprite)
+        return sprite
+
+    def add_text(self, text, x, y, color, font_size, **kwargs):
+        return arcade.Text(text, x, y, color, font_size, batch=self.batch, **kwargs)
+
+    def add_button(self, rect, text, color, hover_color, text_color, font_size=14):
+        button = Button(
+            rect, text, self.sprites, self.batch, color, hover_color, text_color, font_size
+        )
+        self.buttons.append(button)
+        return button
+
+    def hover(self, mouse_x, mouse_y):
+        for button in self.buttons:
+            button.hover(mouse_x, mouse_y)
+
+    def draw(self):
+        self.sprites.draw()
+        self.batch.draw()
+
+
+class Hud(Panel):
+    """
+    Верхняя панель: номер комнаты, таймер и две кнопки.
+    update() вызывается каждый кадр, но перестраивает текст только при смене
+    номера комнаты, десятых долей секунды или секунд перезарядки.
+    """
+
+    def __init__(self, rect, room_pos, timer_pos, shield_rect, menu_rect,
+                 hud_color, text_color, button_colors):
+        super().__init__()
+        self.add_rect(rect, hud_color)
+        self.room_label = self.add_text("", *room_pos, text_color, 16, anchor_y="center")
+        self.timer_label = self.add_text(
+            "", *timer_pos, text_color, 16, anchor_x="center", anchor_y="center"
+        )
+        # button_colors - (обычный, под курсором, цвет надписи)
+        self.shield_button = self.add_button(shield_rect, "", *button_colors)
+        self.menu_button = self.add_button(menu_rect, "Главное меню", *button_colors)
+
+        self._room = None
+        self._tenths = None
+        self._cooldown = None
+
+    def update(self, room_number, level_time, cooldown):
+        if room_number != self._room:
+            self._room = room_number
+            self.room_label.text = f"Комната: {room_number}"
+
+        tenths = round(level_time * 10)
+        if tenths != self._tenths:
+            self._tenths = tenths
+            self.timer_label.text = f"{tenths / 10:.1f} сек"
+
+        if cooldown != self._cooldown:
+            self._cooldown = cooldown
+            self.shield_button.set_text(
+                f"Стоп пуля ({cooldown})" if cooldown > 0 else "Остановить пулю"
+            )
+
+
+class ProfilerOverlay(Panel):
+    """
+    Таблица фаз кадра (p50 / p99, мс) и счётчиков поверх игры.
+    Текст пересобирается не чаще раза в interval секунд.
+    """
+
+    def __init__(self, x, top, width, lines=14, interval=0.5, text_color=arcade.color.WHITE):
+        super().__init__()
+        line_height = 15
+        self.add_rect((x, top - lines * line_height - 6, width, lines * line_height + 6), (0, 0, 0, 170))
+        self.labels = [
+            self.add_text("", x + 6, top - (i + 1) * line_height, text_color, 10,
+                          font_name=("Courier New", "DejaVu Sans Mono"))
+            for i in range(lines)
+        ]
+        self.interval = interval
+        self._next_update = 0.0
+
+    def update(self, profiler, now):
+        if now < self._next_update:
+            return
+        self._next_update = now + self.interval
+
+        stats, counters = profiler.stats()
+        rows = [f"{'фаза':<18}{'p50':>7}{'p99':>7} мс"]
+        for phase, (p50, p99) in sorted(stats.items(), key=lambda item: -item[1][1]):
+            rows.append(f"{phase:<18}{p50 * 1000:7.2f}{p99 * 1000:7.2f}")
+        for name, value in sorted(counters.items()):
+            rows.append(f"{name:<18}{value:14.1f}")
+
+        for i, label in enumerate(self.labels):
+            text = rows[i] if i < len(rows) else ""
+            if label.text != text:
+                label.text = text
@@ -0,0 +1,204 @@
+"""
+Офлайн-сборка набора уровней: много случайных комнат проверяются пакетной
+физикой на веере углов выстрела, нерешаемые отбрасываются, остальные
+сортируются по сложности. Игра берёт комнаты из набора по номеру комнаты.
+
+    python levelpack.py --candidates 5000 --levels 200 -o levels.json
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from batch import BatchSimulator, angle_directions
+from maze import GENERATOR_VERSION, Maze
+from physics import BULLET_RADIUS, BULLET_SPEED
+
+
+PACK_FORMAT = 1
+
+# размеры по умолчанию совпадают с игрой (script.py)
+COLS = 12
+ROWS = 12
+CELL = 50
+WALL = 10
+MARKER_SIZE = 20
+
+ANGLES = 720
+MAX_FRAMES = 3000
+# вес среднего числа отскоков в оценке сложности
+BOUNCE_WEIGHT = 0.05
+
+
+def room_rects(cols, rows, cell, wall, size=MARKER_SIZE):
+    """Старт в центре левой нижней клетки, финиш — в центре правой верхней."""
+    half = wall + (cell - wall) / 2
+    start = (half - size / 2, half - size / 2, size, size)
+    end = (
+        cols * cell + wall - half - size / 2,
+        rows * cell + wall - half - size / 2,
+        size,
+        size,
+    )
+    return start, end
+
+
+def rate_room(job):
+    """
+    Прогнать комнату по seed на angles углах. Выполняется в процессе пула.
+    job - (seed, algorithm, cols, rows, cell, wall, angles, max_frames)
+    Возвращает словарь уровня; success = 0 — комната одним выстрелом не решается.
+    """
+    seed, algorithm, cols, rows, cell, wall, angles, max_frames = job
+    maze = Maze.generate(cols, rows, cell, wall, seed=seed, algorithm=algorithm)
+    start, end = room_rects(cols, rows, cell, wall)
+
+    sim = BatchSimulator(
+        maze.vertical_rects() + maze.horizontal_rects(),
+        cell,
+        cols,
+        rows,
+        radius=BULLET_RADIUS,
+        max_speed=BULLET_SPEED,
+    )
+    result = sim.run(start, end, angle_directions(angles), BULLET_SPEED, max_frames)
+
+    hits = int(result.reached.sum())
+    level = {
+        "seed": seed,
+        "algorithm": algorithm,
+        "success": hits / angles,
+        "shots": hits,
+        "bounces": None,
+        "difficulty": math.inf,
+    }
+    if hits:
+        bounces = result.bounces[result.reached]
+        level["bounces"] = float(np.mean(bounces))
+        # меньше удачных углов и больше отскоков — труднее
+        level["difficulty"] = -math.log2(level["success"]) + BOUNCE_WEIGHT * level["bounces"]
+    return level
+
+
+def pick_levels(rated, count):
+    """
+    Решаемые комнаты по возрастанию сложности; если их больше count,
+    берутся равномерно по всей шкале, чтобы сложность росла плавно.
+    """
+    solved = sorted((r for r in rated if r["shots"]), key=lambda r: r["difficulty"])
+    if len(solved) <= count:
+        return solved
+    if count == 1:
+        return solved[:1]
+    step = (len(solved) - 1) / (count - 1)
+    return [solved[round(i * step)] for i in range(count)]
+
+
+def build_pack(candidates, levels, seed=None, algorithm="dfs", cols=COLS, rows=ROWS,
+               cell=CELL, wall=WALL, angles=ANGLES, max_frames=MAX_FRAMES, workers=None):
+    """Сгенерировать и оценить candidates комнат на всех ядрах, вернуть набор уровней."""
+    rnd = random.Random(seed)
+    jobs = [
+        (rnd.getrandbits(63), algorithm, cols, rows, cell, wall, angles, max_frames)
+        for _ in range(candidates)
+    ]
+    workers = workers or os.cpu_count() or 1
+    chunk = max(1, candidates // (workers * 8))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        rated = list(pool.map(rate_room, jobs, chunksize=chunk))
+
+    return {
+        "format": PACK_FORMAT,
+        "generator": GENERATOR_VERSION,
+        "cols": cols,
+        "rows": rows,
+        "cell": cell,
+        "wall": wall,
+        "angles": angles,
+        "candidates": candidates,
+        "solvable": sum(1 for r in rated if r["shots"]),
+        "levels": pick_levels(rated, levels),
+    }
+
+
+class LevelPack:
+    """Готовый набор уровней; комната n (с 1) — это levels[n - 1]."""
+
+    def __init__(self, data):
+        self.data = data
+        self.levels = data["levels"]
+
+    @classmethod
+    def load(cls, path, cols, rows, cell, wall):
+        """
+        Прочитать набор и проверить, что он собран для этой сетки и этого генератора.
+        Нет файла — None; несовместимый набор — ValueError.
+        """
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            data = json.load(f)
+        if data.get("format") != PACK_FORMAT or data.get("generator") != GENERATOR_VERSION:
+            raise ValueError("набор уровней собран другой версией игры")
+        if (data["cols"], data["rows"], data["cell"], data["wall"]) != (cols, rows, cell, wall):
+            raise ValueError("набор уровней собран для другого размера лабиринта")
+        return cls(data)
+
+    def __len__(self):
+        return len(self.levels)
+
+    def maze(self, room_number, cell, wall):
+        """Лабиринт для комнаты room_number или None, если набор кончился."""
+        if not 1 <= room_number <= len(self.levels):
+            return None
+        level = self.levels[room_number - 1]
+        return Maze.generate(
+            self.data["cols"], self.data["rows"], cell, wall,
+            seed=level["seed"], algorithm=level["algorithm"],
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сборка набора уровней с оценкой сложности")
+    parser.add_argument("--candidates", type=int, default=2000, help="сколько комнат проверить")
+    parser.add_argument("--levels", type=int, default=100, help="сколько уровней оставить")
+    parser.add_argument("--seed", type=int, default=None, help="seed всего набора")
+    parser.add_argument("--algorithm", choices=("dfs", "kruskal"), default="dfs")
+    parser.add_argument("--cols", type=int, default=COLS)
+    parser.add_argument("--rows", type=int, default=ROWS)
+    parser.add_argument("--angles", type=int, default=ANGLES, help="углов выстрела на комнату")
+    parser.add_argument("--max-frames", type=int, default=MAX_FRAMES)
+    parser.add_argument("--workers", type=int, default=None, help="процессов (по умолчанию все ядра)")
+    parser.add_argument("-o", "--output", default="levels.json")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    pack = build_pack(
+        args.candidates,
+        args.levels,
+        seed=args.seed,
+        algorithm=args.algorithm,
+        cols=args.cols,
+        rows=args.rows,
+        angles=args.angles,
+        max_frames=args.max_frames,
+        workers=args.workers,
+    )
+    with open(args.output, "w") as f:
+        json.dump(pack, f)
+
+    print(
+        f"{args.candidates} комнат за {time.perf_counter() - started:.1f} с, "
+        f"решаемых {pack['solvable']}, в наборе {len(pack['levels'])} -> {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
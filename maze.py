@@ -0,0 +1,257 @@
+"""
+Генерация лабиринта без рекурсии на компактных сетках стен NumPy.
+Прямоугольники стен строятся из сеток лениво — только когда они нужны.
+"""
+
+import random
+
+import numpy as np
+
+
+def _dfs(cols, rows, rnd):
+    """
+    Поиск в глубину с явным стеком. Поле окружено рамкой "посещённых" клеток,
+    поэтому проверок границ в цикле нет. Возвращает открытые проходы на восток
+    и на север для каждой клетки (в координатах с рамкой).
+    """
+    width = cols + 2
+    visited = bytearray(b"\x01") * (width * (rows + 2))
+    for r in range(1, rows + 1):
+        visited[r * width + 1 : r * width + 1 + cols] = bytes(cols)
+    east = bytearray(len(visited))
+    north = bytearray(len(visited))
+
+    start = width + 1
+    visited[start] = 1
+    stack = [start]
+    push = stack.append
+    pop = stack.pop
+    rand = rnd.random
+
+    while stack:
+        cur = stack[-1]
+        e = not visited[cur + 1]
+        n = not visited[cur + width]
+        w = not visited[cur - 1]
+        s = not visited[cur - width]
+        k = e + n + w + s
+        if not k:
+            pop()
+            continue
+
+        i = int(rand() * k)
+        if e:
+            if i == 0:
+                east[cur] = 1
+                nxt = cur + 1
+                visited[nxt] = 1
+                push(nxt)
+                continue
+            i -= 1
+        if n:
+            if i == 0:
+                north[cur] = 1
+                nxt = cur + width
+                visited[nxt] = 1
+                push(nxt)
+                continue
+            i -= 1
+        if w:
+            if i == 0:
+                east[cur - 1] = 1
+                nxt = cur - 1
+                visited[nxt] = 1
+                push(nxt)
+                continue
+        nxt = cur - width
+        north[nxt] = 1
+        visited[nxt] = 1
+        push(nxt)
+
+    shape = (rows + 2, width)
+    east = np.frombuffer(east, dtype=np.uint8).reshape(shape)[1:-1, 1:-1].astype(bool)
+    north = np.frombuffer(north, dtype=np.uint8).reshape(shape)[1:-1, 1:-1].astype(bool)
+    return east[:, :-1], north[:-1, :]
+
+
+def _kruskal(cols, rows, rnd):
+    """
+    Случайное остовное дерево (как Крускал со случайными весами), но по раундам
+    Борувки: за раунд каждая компонента берёт своё самое лёгкое ребро наружу,
+    компоненты сливаются через union-find с прыжками по указателям.
+    Всё векторно, поэтому 1000x1000 строится за доли секунды.
+    """
+    rng = np.random.default_rng(rnd.getrandbits(64))
+    n = cols * rows
+    cells = np.arange(n, dtype=np.int32).reshape(rows, cols)
+
+    # рёбра: сначала восточные, затем северные
+    u = np.concatenate((cells[:, :-1].ravel(), cells[:-1, :].ravel()))
+    v = np.concatenate((cells[:, 1:].ravel(), cells[1:, :].ravel()))
+    n_edges = len(u)
+    n_east = rows * (cols - 1)
+
+    # рёбра упорядочены по случайному весу, и весом служит сам номер ранга
+    order = rng.permutation(n_edges).astype(np.int32)
+    cu = u[order]
+    cv = v[order]
+    del u, v, cells
+    rank = np.arange(n_edges, dtype=np.int32)
+    carved = np.zeros(n_edges, dtype=bool)
+
+    parent = np.arange(n, dtype=np.int32)
+    best = np.full(n, n_edges, dtype=np.int32)
+
+    while len(rank):
+        outer = cu != cv
+        cu, cv, rank = cu[outer], cv[outer], rank[outer]
+        if not len(rank):
+            break
+
+        # позиция в отфильтрованном списке растёт вместе с весом ребра
+        idx = np.arange(len(rank), dtype=np.int32)
+        np.minimum.at(best, cu, idx)
+        np.minimum.at(best, cv, idx)
+        roots = np.flatnonzero(best < n_edges).astype(np.int32)
+        pos = best[roots]
+        best[roots] = n_edges
+        carved[order[rank[pos]]] = True
+
+        a = cu[pos]
+        b = cv[pos]
+        target = np.where(a == roots, b, a)
+        # пара компонент, выбравших одно ребро: корнем остаётся меньшая
+        parent[roots] = target
+        mutual = (parent[target] == roots) & (roots < target)
+        parent[roots[mutual]] = roots[mutual]
+
+        p = parent[roots]
+        while True:
+            jumped = parent[p]
+            if np.array_equal(jumped, p):
+                break
+            parent[roots] = jumped
+            p = jumped
+
+        cu = parent[cu]
+        cv = parent[cv]
+        parent[roots] = roots
+
+    east = carved[:n_east].reshape(rows, cols - 1)
+    north = carved[n_east:].reshape(rows - 1, cols)
+    return east, north
+
+
+def _runs(grid):
+    """
+    Непрерывные отрезки True в каждой строке bool-сетки.
+    Возвращает список (строка, начало, конец) — конец не включается.
+    """
+    padded = np.zeros((grid.shape[0], grid.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = grid
+    d = np.diff(padded, axis=1)
+    starts = np.argwhere(d == 1)
+    ends = np.argwhere(d == -1)
+    return np.column_stack((starts, ends[:, 1])).tolist()
+
+
+# Меняется при любой правке генераторов, после которой тот же seed даёт другой лабиринт
+GENERATOR_VERSION = 1
+
+ALGORITHMS = {
+    "dfs": _dfs,
+    "kruskal": _kruskal,
+}
+
+
+class Maze:
+    """
+    Лабиринт cols x rows.
+    v_walls - bool (rows, cols + 1): вертикальная стена слева от клетки (r, c)
+    h_walls - bool (rows + 1, cols): горизонтальная стена снизу от клетки (r, c)
+    cell, wall - размер клетки и толщина стены в пикселях
+    seed, algorithm - чем сгенерирован (None, если восстановлен из прямоугольников)
+    """
+
+    def __init__(self, cols, rows, v_walls, h_walls, cell, wall, seed=None, algorithm=None):
+        self.cols = cols
+        self.rows = rows
+        self.v_walls = v_walls
+        self.h_walls = h_walls
+        self.cell = cell
+        self.wall = wall
+        self.seed = seed
+        self.algorithm = algorithm
+        self._vertical_rects = None
+        self._horizontal_rects = None
+
+    @classmethod
+    def generate(cls, cols, rows, cell, wall, seed=None, algorithm="dfs"):
+        """
+        Случайный идеальный лабиринт (ровно один путь между клетками).
+        "dfs" даёт длинные коридоры, как раньше; "kruskal" — быстрый вариант
+        для огромных комнат с более короткими тупиками.
+        Один и тот же seed всегда даёт один и тот же лабиринт.
+        """
+        if seed is None:
+            seed = random.getrandbits(63)
+        rnd = random.Random(seed)
+        east, north = ALGORITHMS[algorithm](cols, rows, rnd)
+
+        v_walls = np.ones((rows, cols + 1), dtype=bool)
+        h_walls = np.ones((rows + 1, cols), dtype=bool)
+        v_walls[:, 1:-1] = ~east
+        h_walls[1:-1, :] = ~north
+        return cls(cols, rows, v_walls, h_walls, cell, wall, seed, algorithm)
+
+    def to_save(self):
+        """Компактное описание для сохранения: лабиринт восстанавливается по seed."""
+        return {
+            "generator": GENERATOR_VERSION,
+            "algorithm": self.algorithm,
+            "seed": self.seed,
+            "cols": self.cols,
+            "rows": self.rows,
+        }
+
+    @classmethod
+    def from_save(cls, data, cell, wall):
+        """Пересоздать лабиринт по описанию из to_save()."""
+        if data.get("generator") != GENERATOR_VERSION:
+            raise ValueError(f"лабиринт создан другой версией генератора: {data.get('generator')}")
+        return cls.generate(
+            data["cols"], data["rows"], cell, wall, seed=data["seed"], algorithm=data["algorithm"]
+        )
+
+    @classmethod
+    def from_rects(cls, cols, rows, cell, wall, vertical, horizontal):
+        """Восстановить сетки из списков прямоугольников (старые сохранения)."""
+        v_walls = np.zeros((rows, cols + 1), dtype=bool)
+        h_walls = np.zeros((rows + 1, cols), dtype=bool)
+        for x, y, w, h in vertical:
+            c = round(x / cell)
+            v_walls[round(y / cell) : round((y + h) / cell), c] = True
+        for x, y, w, h in horizontal:
+            r = round(y / cell)
+            h_walls[r, round(x / cell) : round((x + w) / cell)] = True
+        return cls(cols, rows, v_walls, h_walls, cell, wall)
+
+    def vertical_rects(self):
+        """Вертикальные стены; подряд идущие в одном столбце слиты в один прямоугольник."""
+        if self._vertical_rects is None:
+            cell, wall = self.cell, self.wall
+            self._vertical_rects = [
+                (float(c * cell), float(r0 * cell), wall, (r1 - r0) * cell)
+                for c, r0, r1 in _runs(self.v_walls.T)
+            ]
+        return self._vertical_rects
+
+    def horizontal_rects(self):
+        """Горизонтальные стены; подряд идущие в одной строке слиты в один прямоугольник."""
+        if self._horizontal_rects is None:
+            cell, wall = self.cell, self.wall
+            self._horizontal_rects = [
+                (float(c0 * cell), float(r * cell), (c1 - c0) * cell, wall)
+                for r, c0, c1 in _runs(self.h_walls)
+            ]
+        return self._horizontal_rects
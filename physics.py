@@ -0,0 +1,462 @@
+"""
+Физика пули без окна и OpenGL: движение, отражения, выталкивание из стен и финиш.
+GameWindow только передаёт сюда ввод и рисует результат.
+"""
+
+import math
+from collections import namedtuple
+
+from spatial import WallIndex
+
+
+BULLET_SPEED = 10
+BULLET_RADIUS = 5
+
+BOUNCE = "bounce"
+GOAL = "goal"
+
+Event = namedtuple("Event", "kind frame x y")
+# шаг без событий возвращает этот общий пустой кортеж, а не новый список
+NO_EVENTS = ()
+
+# допуск на погрешность при касании в непрерывном режиме
+CONTACT_EPS = 1e-9
+# столько касаний подряд без движения — пуля зажата, дальше не двигаем
+MAX_STUCK_CONTACTS = 8
+
+
+class Bullet:
+    __slots__ = ("x", "y", "dx", "dy", "radius")
+
+    def __init__(self, x, y, dx, dy, radius=BULLET_RADIUS):
+        self.x = x
+        self.y = y
+        self.dx = dx
+        self.dy = dy
+        self.radius = radius
+
+
+def move_bullet(b, index, field=None):
+    """
+    Один шаг пули: развертка по X, затем по Y, затем выталкивание из стен.
+    field - DistanceField комнаты: если по нему весь путь за шаг свободен,
+    стены не перебираются (итог тот же, что и без него).
+    Возвращает число отражений от стен на этом шаге.
+    """
+    bounces = 0
+    new_x = b.x
+    new_y = b.y
+
+    tentative_x = b.x + b.dx
+    tentative_y = b.y + b.dy
+
+    radius = b.radius
+
+    if field is not None:
+        # квадрат пули за шаг не выходит из этого круга вокруг середины пути
+        reach = math.hypot(abs(b.dx) / 2 + radius, abs(b.dy) / 2 + radius)
+        if field.clear(b.x + b.dx / 2, b.y + b.dy / 2, reach):
+            b.x = tentative_x
+            b.y = tentative_y
+            return 0
+
+    # только стены из клеток, которые задевает путь пули за шаг
+    walls = index.query(
+        min(b.x, tentative_x) - radius,
+        min(b.y, tentative_y) - radius,
+        max(b.x, tentative_x) + radius,
+        max(b.y, tentative_y) + radius,
+    )
+
+    nearest_x = None
+    nearest_x_dist = float("inf")
+    if b.dx > 0:
+        for wx, wy, ww, wh in walls:
+            if new_y + radius > wy and new_y - radius < wy + wh:
+                collision_x = wx - radius
+                if new_x < collision_x <= tentative_x:
+                    dist = collision_x - new_x
+                    if dist < nearest_x_dist:
+                        nearest_x_dist = dist
+                        nearest_x = collision_x
+    elif b.dx < 0:
+        for wx, wy, ww, wh in walls:
+            if new_y + radius > wy and new_y - radius < wy + wh:
+                collision_x = wx + ww + radius
+                if tentative_x <= collision_x < new_x:
+                    dist = new_x - collision_x
+                    if dist < nearest_x_dist:
+                        nearest_x_dist = dist
+                        nearest_x = collision_x
+
+    if nearest_x is not None:
+        new_x = nearest_x
+        b.dx *= -1
+        bounces += 1
+    else:
+        new_x = tentative_x
+
+    nearest_y = None
+    nearest_y_dist = float("inf")
+    if b.dy > 0:
+        for wx, wy, ww, wh in walls:
+            if new_x + radius > wx and new_x - radius < wx + ww:
+                collision_y = wy - radius
+                if new_y < collision_y <= tentative_y:
+                    dist = collision_y - new_y
+                    if dist < nearest_y_dist:
+                        nearest_y_dist = dist
+                        nearest_y = collision_y
+    elif b.dy < 0:
+        for wx, wy, ww, wh in walls:
+            if new_x + radius > wx and new_x - radius < wx + ww:
+                collision_y = wy + wh + radius
+                if tentative_y <= collision_y < new_y:
+                    dist = new_y - collision_y
+                    if dist < nearest_y_dist:
+                        nearest_y_dist = dist
+                        nearest_y = collision_y
+
+    if nearest_y is not None:
+        new_y = nearest_y
+        b.dy *= -1
+        bounces += 1
+    else:
+        new_y = tentative_y
+
+    for wx, wy, ww, wh in walls:
+        wall_left = wx
+        wall_right = wx + ww
+        wall_bottom = wy
+        wall_top = wy + wh
+        if (
+            new_x + radius > wall_left
+            and new_x - radius < wall_right
+            and new_y + radius > wall_bottom
+            and new_y - radius < wall_top
+        ):
+            overlap_left = abs((new_x + radius) - wall_left)
+            overlap_right = abs(wall_right - (new_x - radius))
+            overlap_bottom = abs((new_y + radius) - wall_bottom)
+            overlap_top = abs(wall_top - (new_y - radius))
+            min_overlap = min(overlap_left, overlap_right, overlap_bottom, overlap_top)
+            if min_overlap == overlap_left:
+                new_x = wall_left - radius
+                b.dx = -abs(b.dx)
+            elif min_overlap == overlap_right:
+                new_x = wall_right + radius
+                b.dx = abs(b.dx)
+            elif min_overlap == overlap_bottom:
+                new_y = wall_bottom - radius
+                b.dy = -abs(b.dy)
+            else:
+                new_y = wall_top + radius
+                b.dy = abs(b.dy)
+
+    b.x = new_x
+    b.y = new_y
+    return bounces
+
+
+def sweep_rect(x, y, vx, vy, rect):
+    """
+    Момент входа точки (x, y) + t * (vx, vy) в прямоугольник (метод плит).
+    Возвращает (t, axis) или None; axis: 0 - вход через вертикальную сторону,
+    1 - через горизонтальную, 2 - ровно в угол. Если точка уже внутри — None.
+    """
+    left, bottom, w, h = rect
+    right = left + w
+    top = bottom + h
+
+    if vx > 0:
+        tx0, tx1 = (left - x) / vx, (right - x) / vx
+    elif vx < 0:
+        tx0, tx1 = (right - x) / vx, (left - x) / vx
+    elif left < x < right:
+        tx0, tx1 = -math.inf, math.inf
+    else:
+        return None
+
+    if vy > 0:
+        ty0, ty1 = (bottom - y) / vy, (top - y) / vy
+    elif vy < 0:
+        ty0, ty1 = (top - y) / vy, (bottom - y) / vy
+    elif bottom < y < top:
+        ty0, ty1 = -math.inf, math.inf
+    else:
+        return None
+
+    t0 = max(tx0, ty0)
+    t1 = min(tx1, ty1)
+    if t0 >= t1 or t0 < -CONTACT_EPS:
+        return None
+    if tx0 > ty0:
+        return t0, 0
+    if ty0 > tx0:
+        return t0, 1
+    return t0, 2
+
+
+def next_contact(index, x, y, vx, vy, t_limit):
+    """
+    Ближайшее касание стены из index не позже t_limit: (t, axis) или None.
+    В index лежат стены, раздутые на радиус пули, поэтому пуля здесь — точка.
+    """
+    best = None
+    best_t = t_limit
+    tested = set()
+    for ids, t_exit in index.ray_cells(x, y, vx, vy):
+        for i in ids:
+            if i in tested:
+                continue
+            tested.add(i)
+            hit = sweep_rect(x, y, vx, vy, index.walls[i])
+            if hit and hit[0] <= best_t:
+                best_t = hit[0]
+                best = hit
+        if best_t <= t_exit:
+            break
+    index.tested += len(tested)
+    return best
+
+
+def in_rect(x, y, rect):
+    rx, ry, rw, rh = rect
+    return rx <= x <= rx + rw and ry <= y <= ry + rh
+
+
+class Simulation:
+    """
+    Комната и пуля в ней.
+    walls - прямоугольники стен (x, y, w, h), start_rect / end_rect - старт и финиш
+    cell, cols, rows - сетка лабиринта для пространственного индекса
+    field - DistanceField комнаты для быстрого шага вдали от стен (необязательно)
+    continuous - непрерывный режим: вместо шага по кадрам с выталкиванием
+        считается точный момент следующего касания, и пуля прыгает от отскока
+        к отскоку. Пуля, как и в покадровом режиме, сталкивается квадратом 2r x 2r,
+        поэтому отражения те же: смена знака dx или dy. Стены не пробиваются
+        на любой скорости.
+    """
+
+    def __init__(self, walls, start_rect, end_rect, cell, cols, rows, bullet=None,
+                 continuous=False, field=None):
+        self.index = WallIndex(walls, cell, cols, rows)
+        self.field = field
+        self.start_rect = start_rect
+        self.end_rect = end_rect
+        self.bullet = bullet
+        self.frame = 0
+        self.continuous = continuous
+        # время в кадрах (дробное) для непрерывного режима
+        self.time = 0.0
+        self._stuck = 0
+        self._swept = {}
+
+    def swept_index(self, radius):
+        """Индекс стен, раздутых на radius (строится один раз на радиус)."""
+        index = self._swept.get(radius)
+        if index is None:
+            walls = [
+                (x - radius, y - radius, w + 2 * radius, h + 2 * radius)
+                for x, y, w, h in self.index.walls
+            ]
+            index = WallIndex(walls, self.index.cell, self.index.cols - 1, self.index.rows - 1)
+            self._swept[radius] = index
+        return index
+
+    @property
+    def walls(self):
+        return self.index.walls
+
+    @property
+    def walls_tested(self):
+        """Сколько стен проверено за всё время, включая луч прицела и непрерывный режим."""
+        return self.index.tested + sum(index.tested for index in self._swept.values())
+
+    def start_point(self):
+        sx, sy, sw, sh = self.start_rect
+        return sx + sw / 2, sy + sh / 2
+
+    def launch(self, dir_x, dir_y, speed=BULLET_SPEED, radius=BULLET_RADIUS):
+        """Выпустить пулю из центра старта в направлении (dir_x, dir_y)."""
+        length = math.hypot(dir_x, dir_y)
+        if length == 0:
+            return None
+        start_x, start_y = self.start_point()
+        self.bullet = Bullet(
+            start_x, start_y, dir_x / length * speed, dir_y / length * speed, radius
+        )
+        return self.bullet
+
+    def probe(self, bullet):
+        """
+        Копия комнаты со своей пулей и общими индексами стен — для предсказания
+        траектории теми же правилами, не трогая настоящую пулю.
+        """
+        probe = Simulation.__new__(Simulation)
+        probe.__dict__.update(self.__dict__)
+        probe.bullet = bullet
+        probe.frame = 0
+        probe.time = 0.0
+        probe._stuck = 0
+        return probe
+
+    def stop(self, move_start=False):
+        """Остановить пулю; move_start переносит старт в точку, где она была."""
+        b = self.bullet
+        if b is not None and move_start:
+            _, _, w, h = self.start_rect
+            self.start_rect = (b.x - w / 2, b.y - h / 2, w, h)
+        self.bullet = None
+
+    def step(self):
+        """Продвинуть пулю на один кадр. Возвращает список событий Event (или NO_EVENTS)."""
+        b = self.bullet
+        if b is None:
+            return NO_EVENTS
+        if self.continuous:
+            return self.advance(1)
+
+        self.frame += 1
+        events = NO_EVENTS
+        bounces = move_bullet(b, self.index, self.field)
+        if bounces:
+            events = [Event(BOUNCE, self.frame, b.x, b.y)] * bounces
+
+        if in_rect(b.x, b.y, self.end_rect):
+            events = list(events)
+            events.append(Event(GOAL, self.frame, b.x, b.y))
+            self.bullet = None
+        return events
+
+    def advance(self, frames):
+        """
+        Продвинуть пулю на frames кадров. В непрерывном режиме это стоит
+        O(отскоков), а не O(кадров). Возвращает список событий.
+        """
+        if not self.continuous:
+            events = []
+            for _ in range(frames):
+                if self.bullet is None:
+                    break
+                events.extend(self.step())
+            return events
+
+        events = []
+        end_time = self.time + frames
+        while self.bullet is not None and self.time < end_time:
+            event = self._next_event(end_time - self.time)
+            if event:
+                events.append(event)
+        self.frame = math.ceil(self.time)
+        return events
+
+    def _next_event(self, t_limit):
+        """
+        Непрерывный режим: довести пулю до ближайшего отскока или финиша,
+        но не дальше t_limit кадров. Возвращает Event или None.
+        """
+        b = self.bullet
+        t_goal = None
+        if in_rect(b.x, b.y, self.end_rect):
+            t_goal = 0.0
+        else:
+            hit = sweep_rect(b.x, b.y, b.dx, b.dy, self.end_rect)
+            if hit and hit[0] <= t_limit:
+                t_goal = max(hit[0], 0.0)
+
+        contact = next_contact(
+            self.swept_index(b.radius), b.x, b.y, b.dx, b.dy,
+            t_limit if t_goal is None else t_goal,
+        )
+
+        if contact is None and t_goal is not None:
+            t = t_goal
+            b.x += b.dx * t
+            b.y += b.dy * t
+            self.time += t
+            self.bullet = None
+            return Event(GOAL, max(1, math.ceil(self.time)), b.x, b.y)
+
+        if contact is None:
+            b.x += b.dx * t_limit
+            b.y += b.dy * t_limit
+            self.time += t_limit
+            return None
+
+        t, axis = contact
+        t = max(t, 0.0)
+        b.x += b.dx * t
+        b.y += b.dy * t
+        if axis != 1:
+            b.dx = -b.dx
+        if axis != 0:
+            b.dy = -b.dy
+
+        if t <= CONTACT_EPS:
+            self._stuck += 1
+            if self._stuck >= MAX_STUCK_CONTACTS:
+                # зажата в углу: стоим до конца отрезка времени
+                self.time += t_limit
+                return None
+        else:
+            self._stuck = 0
+        self.time += t
+        return Event(BOUNCE, max(1, math.ceil(self.time)), b.x, b.y)
+
+    def run_until(self, kind=GOAL, max_steps=100_000):
+        """
+        Шагать, пока не случится событие вида kind (или пока пуля не пропадёт).
+        Возвращает это событие или None, если за max_steps кадров его не было.
+        """
+        if self.continuous:
+            end_time = self.time + max_steps
+            while self.bullet is not None and self.time < end_time:
+                event = self._next_event(end_time - self.time)
+                if event and event.kind == kind:
+                    self.frame = math.ceil(self.time)
+                    return event
+            self.frame = math.ceil(self.time)
+            return None
+
+        for _ in range(max_steps):
+            if self.bullet is None:
+                return None
+            for event in self.step():
+                if event.kind == kind:
+                    return event
+        return None
+
+
+class FixedStepClock:
+    """
+    Аккумулятор фиксированного шага физики.
+    rate - частота физики (шагов в секунду), max_substeps - предел шагов за кадр:
+    после долгого кадра (например, сохранения) догоняем не больше, чем на него.
+    """
+
+    def __init__(self, rate=60, max_substeps=8):
+        self.rate = rate
+        self.dt = 1.0 / rate
+        self.max_substeps = max_substeps
+        self.accumulator = 0.0
+
+    def tick(self, delta_time):
+        """Сколько шагов физики сделать за кадр длиной delta_time."""
+        self.accumulator += delta_time
+        steps = int(self.accumulator // self.dt)
+        if steps > self.max_substeps:
+            # не догоняем бесконечно: лишнее время просто теряется
+            steps = self.max_substeps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * self.dt
+        return steps
+
+    @property
+    def alpha(self):
+        """Доля шага, прошедшая после последнего шага физики (0..1) — для интерполяции."""
+        return min(self.accumulator / self.dt, 1.0)
+
+    def reset(self):
+        self.accumulator = 0.0
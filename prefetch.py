@@ -0,0 +1,111 @@
+"""Заготовка следующих комнат в фоновом потоке, чтобы переход между уровнями не подвисал."""
+
+import queue
+import threading
+
+
+class Room:
+    """
+    Готовая к игре комната.
+    maze - Maze, vertical_walls / horizontal_walls - слитые прямоугольники стен
+    sim - Simulation с уже построенным индексом стен, raycaster - AimRaycaster
+    batch - RoomBatch; собирается с lazy=True, поэтому в GL он попадает только
+        при первой отрисовке в главном потоке
+    """
+
+    def __init__(self, maze, start_rect, end_rect, sim, raycaster, batch):
+        self.maze = maze
+        self.vertical_walls = maze.vertical_rects()
+        self.horizontal_walls = maze.horizontal_rects()
+        self.start_rect = start_rect
+        self.end_rect = end_rect
+        self.sim = sim
+        self.raycaster = raycaster
+        self.batch = batch
+
+
+class RoomPrefetcher:
+    """
+    Фоновый поток, который заранее строит комнаты вызовом build(номер комнаты).
+    lookahead - сколько готовых комнат держать в очереди; когда очередь полна,
+    поток спит и не тратит время кадра.
+    first - номер комнаты, с которой начинать
+    take(n) отдаёт комнату n. Обычно она уже готова; если игрок перескочил
+    на другой номер (загрузка, новая игра), заготовки выбрасываются и постройка
+    начинается с n — тогда take() ждёт, как если бы комната строилась в кадре.
+    """
+
+    def __init__(self, build, lookahead=2, first=1):
+        self.build = build
+        self.lookahead = lookahead
+        self._queue = queue.Queue(maxsize=lookahead)
+        self._lock = threading.Lock()
+        # заготовки помечаются поколением; после seek() старые не отдаются
+        self._generation = 0
+        self._next_build = first
+        self._next_take = first
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="room-prefetch", daemon=True)
+        self._thread.start()
+
+    def seek(self, number):
+        """Следующей будет нужна комната number."""
+        with self._lock:
+            if number == self._next_take:
+                return
+            self._generation += 1
+            self._next_build = number
+            self._next_take = number
+            self._drain()
+
+    def take(self, number):
+        """Комната number. Ошибка постройки пробрасывается сюда."""
+        self.seek(number)
+        with self._lock:
+            self._next_take = number + 1
+            generation = self._generation
+
+        while True:
+            item_generation, room = self._queue.get()
+            if item_generation == generation:
+                break
+        if isinstance(room, Exception):
+            raise room
+        return room
+
+    def ready(self):
+        """Сколько комнат уже построено и ждёт в очереди."""
+        return self._queue.qsize()
+
+    def close(self):
+        """Остановить поток; недостроенная комната выбрасывается."""
+        self._closed.set()
+        # освобождаем место, если поток ждёт в put()
+        self._drain()
+        self._thread.join()
+
+    def _drain(self):
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+    def _run(self):
+        while not self._closed.is_set():
+            with self._lock:
+                generation = self._generation
+                number = self._next_build
+                self._next_build += 1
+
+            try:
+                room = self.build(number)
+            except Exception as e:
+                room = e
+
+            while not self._closed.is_set() and generation == self._generation:
+                try:
+                    self._queue.put((generation, room), timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
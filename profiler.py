@@ -0,0 +1,164 @@
+"""Замеры времени: запуск игры (--profile-startup) и фазы каждого кадра."""
+
+import json
+import time
+from collections import deque
+
+
+class StartupProfile:
+    """
+    Отметки этапов запуска. started - perf_counter() в самом начале процесса,
+    до импорта arcade. mark(фаза) записывает время с предыдущей отметки.
+    """
+
+    def __init__(self, started):
+        self.started = started
+        self.phases = []
+        self._last = started
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def note(self, phase, seconds):
+        """Этап, который шёл параллельно (например, в фоне) — в сумму не входит."""
+        self.phases.append((phase + " (фон)", seconds))
+
+    def total(self):
+        return self._last - self.started
+
+    def report(self):
+        lines = [f"{phase:<30}{seconds * 1000:8.1f} мс" for phase, seconds in self.phases]
+        lines.append(f"{'до первого кадра':<30}{self.total() * 1000:8.1f} мс")
+        return "\n".join(lines)
+
+
+class _Span:
+    __slots__ = ("profiler", "phase", "started")
+
+    def __init__(self, profiler, phase):
+        self.profiler = profiler
+        self.phase = phase
+
+    def __enter__(self):
+        self.started = self.profiler.clock()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler._spans.append((self.phase, self.started, self.profiler.clock() - self.started))
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class FrameProfiler:
+    """
+    Замер фаз кадра: with profiler.span("физика"): ...
+    Выключенный профайлер отдаёт один и тот же пустой span и ничего не пишет.
+    Хранит последние history кадров: для каждого — фазы (имя, начало, длительность)
+    и счётчики. end_frame() закрывает кадр.
+    """
+
+    def __init__(self, history=300, clock=time.perf_counter):
+        self.clock = clock
+        self.enabled = False
+        self.frames = deque(maxlen=history)
+        self._spans = []
+        self._counters = {}
+        self._frame_started = clock()
+
+    def span(self, phase):
+        if not self.enabled:
+            return _NO_SPAN
+        return _Span(self, phase)
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def gauge(self, name, value):
+        """Значение на конец кадра (например, живые частицы)."""
+        if self.enabled:
+            self._counters[name] = value
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self._spans = []
+        self._counters = {}
+        self._frame_started = self.clock()
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        now = self.clock()
+        self.frames.append((self._frame_started, now - self._frame_started, self._spans, self._counters))
+        self._spans = []
+        self._counters = {}
+        self._frame_started = now
+
+    def stats(self):
+        """
+        {фаза: (p50, p99)} в секундах по сумме фазы за кадр и {счётчик: среднее}.
+        Фаза "кадр" — весь кадр целиком.
+        """
+        per_phase = {"кадр": [frame[1] for frame in self.frames]}
+        counters = {}
+        for _, _, spans, frame_counters in self.frames:
+            totals = {}
+            for phase, _, duration in spans:
+                totals[phase] = totals.get(phase, 0.0) + duration
+            for phase, total in totals.items():
+                per_phase.setdefault(phase, []).append(total)
+            for name, value in frame_counters.items():
+                counters.setdefault(name, []).append(value)
+
+        n = len(self.frames)
+        result = {}
+        for phase, values in per_phase.items():
+            # кадры без этой фазы считаются нулевыми
+            values = sorted(values + [0.0] * (n - len(values)))
+            if values:
+                result[phase] = (_percentile(values, 0.5), _percentile(values, 0.99))
+        means = {name: sum(values) / n for name, values in counters.items() if n}
+        return result, means
+
+    def chrome_trace(self):
+        """Последние кадры в формате Chrome trace (chrome://tracing, Perfetto)."""
+        events = []
+        for started, duration, spans, counters in self.frames:
+            events.append(_trace_event("кадр", started, duration))
+            for phase, span_started, span_duration in spans:
+                events.append(_trace_event(phase, span_started, span_duration))
+            if counters:
+                events.append({
+                    "name": "счётчики", "ph": "C", "pid": 1, "tid": 1,
+                    "ts": started * 1e6, "args": counters,
+                })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
+
+
+def _trace_event(name, started, duration):
+    return {
+        "name": name, "ph": "X", "pid": 1, "tid": 1,
+        "ts": started * 1e6, "dur": duration * 1e6,
+    }
+
+
+def _percentile(values, q):
+    return values[min(len(values) - 1, int(q * len(values)))]
@@ -0,0 +1,111 @@
+"""Луч прицела: обход сетки лабиринта по клеткам (DDA) с кэшем результатов."""
+
+import math
+
+
+def ray_rect_hit(x, y, ux, uy, rect, best_t):
+    """
+    Пересечение луча (x, y) + t * (ux, uy) со сторонами прямоугольника.
+    Возвращает (t, hit_x, hit_y) для ближайшего попадания раньше best_t или None.
+    """
+    wall_left, wall_bottom, w, h = rect
+    wall_right = wall_left + w
+    wall_top = wall_bottom + h
+    result = None
+
+    if abs(ux) > 1e-9:
+        for x_side in (wall_left, wall_right):
+            t = (x_side - x) / ux
+            if 0 < t < best_t:
+                y_hit = y + uy * t
+                if wall_bottom - 1e-6 <= y_hit <= wall_top + 1e-6:
+                    best_t = t
+                    result = (t, x_side, y_hit)
+
+    if abs(uy) > 1e-9:
+        for y_side in (wall_bottom, wall_top):
+            t = (y_side - y) / uy
+            if 0 < t < best_t:
+                x_hit = x + ux * t
+                if wall_left - 1e-6 <= x_hit <= wall_right + 1e-6:
+                    best_t = t
+                    result = (t, x_hit, y_side)
+
+    return result
+
+
+class AimRaycaster:
+    """
+    Ищет первую стену на луче прицела через WallIndex.
+    Направление квантуется по углу (angle_step, радианы), результат кэшируется
+    по (старт, квант угла), поэтому неподвижный курсор ничего не стоит.
+    field - DistanceField комнаты: по нему луч сначала проходит пустое место
+        большими шагами, и стены перебираются только у самой поверхности
+    """
+
+    def __init__(self, index, max_distance=5000.0, angle_step=0.001, cache_size=4096,
+                 field=None):
+        self.index = index
+        self.field = field
+        self.max_distance = max_distance
+        self.angle_step = angle_step
+        self.cache_size = cache_size
+        self._cache = {}
+        self._last_key = None
+        self._last_hit = None
+
+    def cast(self, start_x, start_y, target_x, target_y):
+        """Точка попадания луча из (start_x, start_y) в сторону (target_x, target_y)."""
+        if target_x == start_x and target_y == start_y:
+            q = 0
+        else:
+            q = round(math.atan2(target_y - start_y, target_x - start_x) / self.angle_step)
+
+        key = (start_x, start_y, q)
+        if key == self._last_key:
+            return self._last_hit
+
+        hit = self._cache.get(key)
+        if hit is None:
+            angle = q * self.angle_step
+            hit = self.trace(start_x, start_y, math.cos(angle), math.sin(angle))
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[key] = hit
+
+        self._last_key = key
+        self._last_hit = hit
+        return hit
+
+    def trace(self, x, y, ux, uy):
+        """Обход клеток вдоль единичного направления (ux, uy) до первой стены."""
+        index = self.index
+        best_t = self.max_distance
+        hit_x = x + ux * best_t
+        hit_y = y + uy * best_t
+
+        if self.field is not None:
+            # до t0 стен точно нет — дальше ищем от этой точки
+            t0 = self.field.march(x, y, ux, uy, best_t)
+            if t0 >= best_t:
+                return hit_x, hit_y
+            x += ux * t0
+            y += uy * t0
+            best_t -= t0
+
+        tested = set()
+        for ids, t_exit in index.ray_cells(x, y, ux, uy):
+            for i in ids:
+                if i in tested:
+                    continue
+                tested.add(i)
+                found = ray_rect_hit(x, y, ux, uy, index.walls[i], best_t)
+                if found:
+                    best_t, hit_x, hit_y = found
+
+            # стена ближе выхода из клетки — дальше искать незачем
+            if best_t <= t_exit:
+                break
+
+        index.tested += len(tested)
+        return hit_x, hit_y
@@ -0,0 +1,237 @@
+"""Пакетная отрисовка: статическая геометрия комнаты и частицы."""
+
+import math
+
+import arcade
+import numpy as np
+from arcade.gl import BufferDescription
+from pyglet.gl import GL_PROGRAM_POINT_SIZE
+
+
+def _chunk_walls(walls, chunk):
+    """Разрезать стены по сетке кусков chunk x chunk пикселей: {(cx, cy): [прямоугольники]}."""
+    chunks = {}
+    for x, y, w, h in walls:
+        right = x + w
+        top = y + h
+        for cy in range(int(y // chunk), int(math.ceil(top / chunk))):
+            bottom = max(y, cy * chunk)
+            upper = min(top, (cy + 1) * chunk)
+            for cx in range(int(x // chunk), int(math.ceil(right / chunk))):
+                left = max(x, cx * chunk)
+                end = min(right, (cx + 1) * chunk)
+                chunks.setdefault((cx, cy), []).append((left, bottom, end - left, upper - bottom))
+    return chunks
+
+
+class RoomBatch:
+    """
+    Стены, стартовая текстура и финиш одной комнаты.
+    Стены разрезаны на квадратные куски по chunk пикселей. Кусок собирается
+    в свой SpriteList при первом попадании в кадр, а кусок, которого не было
+    видно evict_after кадров, выбрасывается вместе с буферами GPU. Рисуются
+    только куски, задевающие видимую область, поэтому кадр стоит одинаково
+    для лабиринта любого размера.
+    lazy - не трогать GL до первой отрисовки; так батч можно собрать
+        в фоновом потоке, а буферы создадутся уже в главном
+    """
+
+    def __init__(self, walls, start_rect, end_rect, start_texture, wall_color, end_color,
+                 lazy=False, chunk=800, evict_after=120):
+        self.chunk = chunk
+        self.wall_color = wall_color
+        self.evict_after = evict_after
+        self.chunks = _chunk_walls(walls, chunk)
+        # собранные куски: (cx, cy) -> [SpriteList, номер кадра, когда был виден]
+        self.live = {}
+        self.frame = 0
+        # видимые куски прошлого кадра: пока камера в тех же кусках, список не пересобирается
+        self._visible_range = None
+        self._visible = []
+
+        self.markers = arcade.SpriteList(capacity=2, lazy=lazy)
+        self.start_sprite = arcade.Sprite(start_texture)
+        self.move_start(start_rect)
+        self.markers.append(self.start_sprite)
+
+        ex, ey, ew, eh = end_rect
+        self.markers.append(
+            arcade.SpriteSolidColor(int(ew), int(eh), ex + ew / 2, ey + eh / 2, end_color)
+        )
+
+    def set_start_texture(self, texture):
+        # текстура старта догружается в фоне; размер задаёт прямоугольник, не картинка
+        if texture is not self.start_sprite.texture:
+            self.start_sprite.texture = texture
+            self.move_start(self.start_rect)
+
+    def move_start(self, rect):
+        # старт переносится кнопкой "Остановить пулю" — пересобирать всё не нужно
+        self.start_rect = rect
+        x, y, w, h = rect
+        self.start_sprite.width = w
+        self.start_sprite.height = h
+        self.start_sprite.center_x = x + w / 2
+        self.start_sprite.center_y = y + h / 2
+
+    def _build(self, key):
+        rects = self.chunks[key]
+        sprites = arcade.SpriteList(capacity=len(rects))
+        for x, y, w, h in rects:
+            sprites.append(
+                arcade.SpriteSolidColor(int(w), int(h), x + w / 2, y + h / 2, self.wall_color)
+            )
+        entry = [sprites, self.frame]
+        self.live[key] = entry
+        return entry
+
+    def visible_chunks(self, view):
+        """Ключи кусков со стенами, которые задевает view = (left, bottom, right, top)."""
+        left, bottom, right, top = view
+        chunk = self.chunk
+        c0 = int(left // chunk)
+        c1 = int(right // chunk)
+        r0 = int(bottom // chunk)
+        r1 = int(top // chunk)
+        if (self._visible_range is not None and self._visible_range[0] == c0
+                and self._visible_range[1] == r0 and self._visible_range[2] == c1
+                and self._visible_range[3] == r1):
+            return self._visible
+
+        chunks = self.chunks
+        self._visible_range = (c0, r0, c1, r1)
+        self._visible = [
+            (cx, cy)
+            for cy in range(r0, r1 + 1)
+            for cx in range(c0, c1 + 1)
+            if (cx, cy) in chunks
+        ]
+        return self._visible
+
+    def draw(self, view=None):
+        """Нарисовать куски, видимые в view (None — все), и старт с финишем."""
+        self.frame += 1
+        keys = self.chunks if view is None else self.visible_chunks(view)
+        for key in keys:
+            entry = self.live.get(key) or self._build(key)
+            entry[1] = self.frame
+            entry[0].draw()
+        self.markers.draw()
+
+        if self.frame % 30 == 0:
+            self.evict()
+
+    def evict(self):
+        """Выбросить куски, которых давно не было на экране."""
+        oldest = self.frame - self.evict_after
+        stale = [key for key, (_, seen) in self.live.items() if seen < oldest]
+        for key in stale:
+            sprites = self.live.pop(key)[0]
+            # спрайты держат ссылку на список — разрываем, чтобы буферы освободились
+            sprites.clear()
+
+
+PARTICLE_VERTEX_SHADER = """
+#version 330
+
+uniform WindowBlock {
+    mat4 projection;
+    mat4 view;
+} window;
+
+in vec2 in_pos;
+in float in_radius;
+in float in_alpha;
+
+out float v_alpha;
+
+void main() {
+    gl_Position = window.projection * window.view * vec4(in_pos, 0.0, 1.0);
+    gl_PointSize = in_radius * 2.0;
+    v_alpha = in_alpha;
+}
+"""
+
+PARTICLE_FRAGMENT_SHADER = """
+#version 330
+
+in float v_alpha;
+
+out vec4 fragColor;
+
+void main() {
+    // круглая точка вместо квадратной
+    vec2 p = gl_PointCoord * 2.0 - 1.0;
+    if (dot(p, p) > 1.0) {
+        discard;
+    }
+    fragColor = vec4(1.0, 1.0, 1.0, v_alpha);
+}
+"""
+
+
+class ParticleRenderer:
+    """
+    Рисует весь ParticlePool одним вызовом: точки с размером и прозрачностью
+    из вершинного буфера, который перезаписывается каждый кадр.
+    """
+
+    def __init__(self, ctx, capacity):
+        self.ctx = ctx
+        # x, y, radius, alpha
+        self.vertices = np.zeros((capacity, 4), dtype=np.float32)
+        self.buffer = ctx.buffer(reserve=self.vertices.nbytes, usage="stream")
+        self.geometry = ctx.geometry(
+            [BufferDescription(self.buffer, "2f 1f 1f", ["in_pos", "in_radius", "in_alpha"])],
+            mode=ctx.POINTS,
+        )
+        self.program = ctx.program(
+            vertex_shader=PARTICLE_VERTEX_SHADER,
+            fragment_shader=PARTICLE_FRAGMENT_SHADER,
+        )
+
+    def draw(self, pool):
+        n = min(pool.count, len(self.vertices))
+        if n == 0:
+            return
+        v = self.vertices
+        v[:n, 0] = pool.x[:n]
+        v[:n, 1] = pool.y[:n]
+        v[:n, 2] = pool.radius[:n]
+        np.divide(pool.life[:n], pool.max_life[:n], out=v[:n, 3])
+        np.clip(v[:n, 3], 0.0, 1.0, out=v[:n, 3])
+
+        self.buffer.write(v[:n])
+        with self.ctx.enabled(self.ctx.BLEND, GL_PROGRAM_POINT_SIZE):
+            self.geometry.render(self.program, vertices=n)
+
+
+class SwarmRenderer:
+    """
+    Пули роя одним SpriteList. Спрайты создаются заранее на всю ёмкость
+    и только добавляются в список или убираются из него по числу живых пуль.
+    """
+
+    def __init__(self, capacity, radius, color):
+        texture = arcade.make_circle_texture(radius * 2, color)
+        self.pool = [arcade.Sprite(texture) for _ in range(capacity)]
+        self.sprites = arcade.SpriteList(capacity=capacity)
+
+    def draw(self, swarm, alpha=1.0):
+        n = swarm.count
+        sprites = self.sprites
+        while len(sprites) < n:
+            sprites.append(self.pool[len(sprites)])
+        while len(sprites) > n:
+            sprites.pop()
+        if n == 0:
+            return
+
+        # между шагами физики — промежуточная точка, как у основной пули
+        px = swarm.prev_x[:n]
+        py = swarm.prev_y[:n]
+        xs = (px + (swarm.x[:n] - px) * alpha).tolist()
+        ys = (py + (swarm.y[:n] - py) * alpha).tolist()
+        for sprite, x, y in zip(sprites, xs, ys):
+            sprite.position = (x, y)
+        sprites.draw()
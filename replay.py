@@ -0,0 +1,232 @@
+"""
+Запись комнат и их быстрый повтор без окна.
+В записи — seed лабиринта, выстрелы и остановки пули с номерами шагов физики
+и итог комнаты. Повтор гоняет ту же Simulation, что и игра, и сверяет итог
+с записанным до бита.
+
+    python replay.py replays.jsonl
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+
+from maze import Maze
+from physics import BOUNCE, GOAL, Bullet, Simulation
+
+
+def bullet_state(b):
+    return None if b is None else [b.x, b.y, b.dx, b.dy, b.radius]
+
+
+class RoomRecorder:
+    """
+    Ввод и итог одной комнаты.
+    steps - сколько шагов физики сделано, по нему привязываются выстрелы и остановки
+    checkpoints - состояние пули перед каждой остановкой
+    """
+
+    def __init__(self, maze, start_rect, end_rect, cell, wall, continuous=False, bullet=None):
+        self.maze = maze.to_save()
+        self.cell = cell
+        self.wall = wall
+        self.start_rect = list(start_rect)
+        self.end_rect = list(end_rect)
+        self.continuous = continuous
+        self.bullet = bullet_state(bullet)
+        self.inputs = []
+        self.steps = 0
+        self.bounces = 0
+        self.goal = None
+        self.checkpoints = []
+
+    def set_bullet(self, bullet):
+        """Пуля, которая уже летела при входе в комнату (из сохранения)."""
+        self.bullet = bullet_state(bullet)
+
+    def launch(self, dir_x, dir_y, speed):
+        self.inputs.append({"kind": "launch", "step": self.steps, "dx": dir_x, "dy": dir_y,
+                            "speed": speed})
+
+    def stop(self, bullet):
+        self.inputs.append({"kind": "stop", "step": self.steps})
+        self.checkpoints.append(bullet_state(bullet))
+
+    def advance(self, events):
+        """Учесть один шаг физики и его события."""
+        self.steps += 1
+        for event in events:
+            if event.kind == BOUNCE:
+                self.bounces += 1
+            elif event.kind == GOAL:
+                self.goal = self.steps
+
+    def finish(self, reason, bullet):
+        """Запись комнаты; reason - почему комната закончилась (goal, skip, quit)."""
+        return {
+            "reason": reason,
+            "maze": self.maze,
+            "cell": self.cell,
+            "wall": self.wall,
+            "start_rect": self.start_rect,
+            "end_rect": self.end_rect,
+            "continuous": self.continuous,
+            "bullet": self.bullet,
+            "inputs": self.inputs,
+            "result": {
+                "steps": self.steps,
+                "bounces": self.bounces,
+                "goal": self.goal,
+                "checkpoints": self.checkpoints,
+                "final": bullet_state(bullet),
+            },
+        }
+
+
+def replay(record):
+    """Повторить комнату по записи. Возвращает итог в том же виде, что record["result"]."""
+    maze = Maze.from_save(record["maze"], record["cell"], record["wall"])
+    sim = Simulation(
+        maze.vertical_rects() + maze.horizontal_rects(),
+        tuple(record["start_rect"]),
+        tuple(record["end_rect"]),
+        record["cell"],
+        maze.cols,
+        maze.rows,
+        continuous=record["continuous"],
+    )
+    if record["bullet"]:
+        sim.bullet = Bullet(*record["bullet"])
+
+    steps = 0
+    bounces = 0
+    goal = None
+    checkpoints = []
+
+    def run_to(target):
+        nonlocal steps, bounces, goal
+        while steps < target and sim.bullet is not None:
+            steps += 1
+            for event in sim.step():
+                if event.kind == BOUNCE:
+                    bounces += 1
+                elif event.kind == GOAL:
+                    goal = steps
+
+    for action in record["inputs"]:
+        run_to(action["step"])
+        if action["kind"] == "launch":
+            sim.launch(action["dx"], action["dy"], speed=action["speed"])
+        else:
+            checkpoints.append(bullet_state(sim.bullet))
+            sim.stop(move_start=True)
+    run_to(record["result"]["steps"])
+
+    return {
+        "steps": steps,
+        "bounces": bounces,
+        "goal": goal,
+        "checkpoints": checkpoints,
+        "final": bullet_state(sim.bullet),
+    }
+
+
+class ReplayLog:
+    """
+    Записи комнат по одной JSON-строке в файле.
+    append() не блокирует: записи дописываются в файл фоновым потоком
+    (как SaveWriter), чтобы смена комнаты не ждала диска. Поток запускается
+    при первой записи; close() дописывает очередь.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._cond = threading.Condition()
+        self._queue = []
+        self._busy = False
+        self._closed = False
+        self._thread = None
+
+    def append(self, record):
+        """Поставить record в очередь. record после этого менять нельзя."""
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="replay-writer", daemon=True
+                )
+                self._thread.start()
+            self._queue.append(record)
+            self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """Дождаться, пока всё отправленное окажется в файле. False — не дождались."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and not self._busy, timeout)
+
+    def close(self):
+        """Дописать очередь и остановить поток."""
+        if self._thread is None:
+            return
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or self._closed)
+                if not self._queue:
+                    return
+                records = self._queue
+                self._queue = []
+                self._busy = True
+
+            try:
+                with open(self.path, "a") as f:
+                    for record in records:
+                        f.write(json.dumps(record) + "\n")
+            except Exception as e:
+                print("Ошибка записи комнаты:", e)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def read(self):
+        with open(self.path, "r") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Повтор записанных комнат с проверкой итога")
+    parser.add_argument("path", nargs="?", default="replays.jsonl")
+    parser.add_argument("--repeat", type=int, default=1, help="прогнать весь набор N раз (замер)")
+    args = parser.parse_args()
+
+    records = ReplayLog(args.path).read()
+    mismatches = 0
+    total_steps = 0
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        for i, record in enumerate(records):
+            result = replay(record)
+            total_steps += result["steps"]
+            if result != record["result"]:
+                mismatches += 1
+                print(f"РАСХОЖДЕНИЕ в записи {i}: ожидалось {record['result']}, получено {result}")
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"{len(records) * args.repeat} комнат, {total_steps} шагов за {elapsed:.2f} с "
+        f"({total_steps / max(elapsed, 1e-9):.0f} шагов/с), расхождений {mismatches}"
+    )
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Запись сохранений в фоновом потоке: без подвисаний кадра и без полузаписанных файлов."""
+
+import json
+import os
+import threading
+
+
+def write_atomic(path, data):
+    """
+    Записать JSON во временный файл рядом, сбросить на диск и подменить им path.
+    При падении посреди записи на диске остаётся старое сохранение целиком.
+    """
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+    # на POSIX переименование тоже нужно сбросить на диск (на Windows так нельзя)
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class SaveWriter:
+    """
+    Фоновый писатель сохранений.
+    submit() не блокирует: если поток ещё пишет, новые данные ждут своей очереди,
+    а несколько сохранений подряд схлопываются в одно — пишется последнее.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._cond = threading.Condition()
+        self._pending = None
+        self._busy = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="save-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, data):
+        """Поставить data в очередь на запись. data после этого менять нельзя."""
+        with self._cond:
+            self._pending = data
+            self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """Дождаться, пока всё отправленное окажется на диске. False — не дождались."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: self._pending is None and not self._busy, timeout
+            )
+
+    def delete(self):
+        """Отменить ожидающую запись и удалить файл сохранения."""
+        with self._cond:
+            self._pending = None
+            self._cond.wait_for(lambda: not self._busy)
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def close(self):
+        """Дописать очередь и остановить поток."""
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending is not None or self._closed)
+                if self._pending is None:
+                    return
+                data = self._pending
+                self._pending = None
+                self._busy = True
+
+            try:
+                write_atomic(self.path, data)
+            except Exception as e:
+                print("Ошибка сохранения:", e)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
@@ -1,10 +1,32 @@
-import arcade
-import random
 import time
+
+# до импорта arcade: отсюда считается время до первого кадра (--profile-startup)
+STARTED = time.perf_counter()
+
+import arcade
+import argparse
 import math
 import json
 import os
 
+from assets import AssetLoader
+from audio import SoundManager
+from batch import BatchSimulator
+from bullets import BulletSwarm
+from camera import FollowCamera
+from hud import Hud, Panel, ProfilerOverlay
+from levelpack import LevelPack
+from maze import Maze
+from particles import ParticlePool
+from physics import BOUNCE, BULLET_SPEED, GOAL, Bullet, FixedStepClock, Simulation
+from prefetch import Room, RoomPrefetcher
+from profiler import FrameProfiler, StartupProfile
+from raycast import AimRaycaster
+from replay import ReplayLog, RoomRecorder
+from render import ParticleRenderer, RoomBatch, SwarmRenderer
+from saves import SaveWriter
+from sdf import DistanceField
+from trajectory import TrajectoryPreview
 
 WALL = 10
 PASSAGE = 40
@@ -16,9 +38,14 @@ WALL_OVERLAP = 1.5
 
 MAZE_WIDTH = COLS * CELL + WALL
 MAZE_HEIGHT = ROWS * CELL + WALL
-SCREEN_WIDTH = MAZE_WIDTH
-SCREEN_HEIGHT = MAZE_HEIGHT + 90
-HUD_HEIGHT = SCREEN_HEIGHT - MAZE_HEIGHT
+# большой лабиринт не влезает в окно — тогда по нему ездит камера
+MAX_VIEW_WIDTH = 1000
+MAX_VIEW_HEIGHT = 700
+VIEW_WIDTH = min(MAZE_WIDTH, MAX_VIEW_WIDTH)
+VIEW_HEIGHT = min(MAZE_HEIGHT, MAX_VIEW_HEIGHT)
+HUD_HEIGHT = 90
+SCREEN_WIDTH = VIEW_WIDTH
+SCREEN_HEIGHT = VIEW_HEIGHT + HUD_HEIGHT
 
 WINDOW_TITLE = "bullet in the mosaic"
 
@@ -42,6 +69,47 @@ SHADOW_OFFSET = 4
 SHADOW_COLOR = (0, 0, 0, 120)  # полупрозрачная тень
 COOLDOWN_MAX = 7
 SAVE_FILE = "save.json"
+# 2 — лабиринт хранится как (версия генератора, seed, размеры)
+SAVE_FORMAT = 2
+# набор уровней от levelpack.py; без него комнаты случайные
+LEVEL_PACK_FILE = "levels.json"
+
+PARTICLE_CAPACITY = 4096
+# Частота физики (шагов в секунду) не зависит от частоты кадров.
+# Скорость пули задана в пикселях за шаг при 60 Гц и пересчитывается под частоту.
+PHYSICS_RATE = 60
+MAX_SUBSTEPS = 8
+BULLET_STEP_SPEED = BULLET_SPEED * 60 / PHYSICS_RATE
+# True — точный расчёт касаний вместо покадрового шага (см. physics.Simulation)
+CONTINUOUS_COLLISION = False
+# частиц следа за шаг при 60 Гц; при другой PHYSICS_RATE пересчитывается,
+# чтобы частиц в секунду (и работы отрисовки) было столько же
+PARTICLES_PER_STEP = 2
+# сколько следующих комнат держать готовыми в фоне
+PREFETCH_ROOMS = 2
+# одновременно звучащих звуков не больше MAX_VOICES
+MAX_VOICES = 8
+# отскоки чаще этого (в секундах) не озвучиваются — пуля, трущаяся об угол, не гудит
+BOUNCE_MIN_INTERVAL = 0.05
+# F3 — оверлей с фазами кадра, F4 — последние кадры в Chrome trace
+TRACE_FILE = "trace.json"
+TRACE_FRAMES = 300
+# каждая пройденная или брошенная комната дописывается сюда (см. replay.py)
+REPLAY_FILE = "replays.jsonl"
+# стены рисуются кусками по CHUNK_CELLS x CHUNK_CELLS клеток
+CHUNK_CELLS = 16
+CAMERA_SPEED = 6.0
+# M — режим роя: правая кнопка мыши выпускает веер из SPREAD_COUNT пуль,
+# при SPLIT_ON_BOUNCE они делятся на отскоках. Рой только для красоты:
+# долетевшие до финиша пули просто исчезают, комнату проходит лишь основная пуля
+SWARM_CAPACITY = 512
+SPREAD_COUNT = 24
+SPREAD_ANGLE = 0.6
+SPLIT_ON_BOUNCE = True
+# шаг сетки поля расстояний до стен, пикселей (память и время постройки — bench.py)
+SDF_RESOLUTION = 5.0
+# T — предпросмотр пути пули через PREVIEW_BOUNCES отскоков вместо линии прицела
+PREVIEW_BOUNCES = 24
 
 # --- UI функции ---
 BUTTON_RADIUS = 10
@@ -125,6 +193,23 @@ def center_to_lbwh(cx, cy, w, h):
     return cx - w / 2, cy - h / 2, w, h
 
 
+def default_start_rect():
+    # старт в левой нижней клетке
+    return center_to_lbwh(
+        WALL + PASSAGE / 2, WALL + PASSAGE / 2, START_SIZE, START_SIZE
+    )
+
+
+def default_end_rect():
+    # финиш в правой верхней клетке
+    return center_to_lbwh(
+        MAZE_WIDTH - WALL - PASSAGE / 2,
+        MAZE_HEIGHT - WALL - PASSAGE / 2,
+        END_SIZE,
+        END_SIZE,
+    )
+
+
 def _draw_rectangle_filled_center(cx, cy, w, h, color):
     hw = w / 2
     hh = h / 2
@@ -171,40 +256,36 @@ class BulletSprite(arcade.SpriteCircle):
 
 
 
-class Particle:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.dx = random.uniform(-2.0, 2.0)
-        self.dy = random.uniform(-2.0, 2.0)
-        self.life = random.uniform(0.1, 0.3)
-        self.max_life = self.life
-        self.radius = random.uniform(0.5, 1.2)
-
-    def update(self, dt):
-        self.x += self.dx
-        self.y += self.dy
-        self.life -= dt
-
-    def draw(self):
-        alpha = int(255 * max(0, self.life / self.max_life))
-        color = (255, 255, 255, alpha)
-        arcade.draw_circle_filled(self.x, self.y, self.radius, color)
-
-
-
 class GameWindow(arcade.Window):
-    def __init__(self):
+    def __init__(self, profile=None, trace_file=None, trace_frames=TRACE_FRAMES):
         self.paused = False
         self.pause_start_time = time.time()
+        self.profile = profile
+        # trace_file задан — фазы пишутся с первого кадра и сохраняются при выходе
+        self.trace_file = trace_file
+        self.frame_profiler = FrameProfiler(trace_frames)
+        self.frame_profiler.enabled = trace_file is not None
+        self._walls_tested_seen = 0
+        self.replay_log = ReplayLog(REPLAY_FILE)
+        self.closing = False
+        self.recorder = None
 
-        try:
-            self.bounce_sound = arcade.load_sound("assets/song2.mp3")
-        except:
-            self.bounce_sound = None
         super().__init__(SCREEN_WIDTH, SCREEN_HEIGHT, WINDOW_TITLE)
         arcade.set_background_color(BACKGROUND_COLOR)
-        self.start_texture = arcade.load_texture("assets/start.png")
+        self.mark("окно")
+
+        # файлы декодируются в фоне; до этого старт рисуется зелёным квадратом,
+        # а отскоки звучат молча
+        self.sound = SoundManager(MAX_VOICES)
+        self.assets = AssetLoader(self.ctx.default_atlas)
+        self.start_texture = arcade.make_soft_square_texture(
+            START_SIZE, START_COLOR, outer_alpha=255
+        )
+        self.assets.texture("assets/start.png", self.set_start_texture)
+        self.assets.sound(
+            self.sound, "bounce", "assets/song2.mp3", min_interval=BOUNCE_MIN_INTERVAL
+        )
+        self.mark("ассеты")
 
 
         # Стартовый экран
@@ -214,7 +295,7 @@ class GameWindow(arcade.Window):
         self.level_start_time = time.time()
         self.level_time = 0
 
-        self.hud_y = MAZE_HEIGHT + HUD_HEIGHT // 2
+        self.hud_y = VIEW_HEIGHT + HUD_HEIGHT // 2
         self.room_text_pos = (20, self.hud_y)
         self.timer_pos = (200, self.hud_y)
 
@@ -234,19 +315,68 @@ class GameWindow(arcade.Window):
             45,
         )
 
+        # интерфейс собирается один раз, в кадре меняются только значения
+        button_colors = (BUTTON_COLOR, BUTTON_HOVER_COLOR, BUTTON_TEXT_COLOR)
+        self.hud = Hud(
+            (0, VIEW_HEIGHT, SCREEN_WIDTH, HUD_HEIGHT),
+            self.room_text_pos,
+            self.timer_pos,
+            self.shield_button,
+            self.menu_button,
+            HUD_COLOR,
+            arcade.color.BLACK,
+            button_colors,
+        )
+        self.start_menu = Panel()
+        self.start_menu.add_text(
+            "bullet in the mosaic",
+            SCREEN_WIDTH // 2,
+            SCREEN_HEIGHT // 2 + 90,
+            TITLE_COLOR,
+            36,
+            anchor_x="center",
+        )
+        self.start_menu.add_button(
+            self.start_continue_button, "Продолжить прохождение", *button_colors
+        )
+        self.start_menu.add_button(self.start_new_button, "Начать заново", *button_colors)
+        self.profiler_overlay = ProfilerOverlay(10, VIEW_HEIGHT - 10, 300)
+        self.camera = FollowCamera(
+            (0, 0, VIEW_WIDTH, VIEW_HEIGHT), MAZE_WIDTH, MAZE_HEIGHT, CAMERA_SPEED
+        )
+
+        self.maze = None
         self.vertical_walls = []
         self.horizontal_walls = []
+        self.sim = None
+        self.raycaster = None
+        self.room_batch = None
 
         self.start_rect = None
         self.end_rect = None
 
-        self.bullet = None
-        self.bullet_active = False
-        self.particles = []
+        self.particles = ParticlePool(PARTICLE_CAPACITY)
+        self.particle_renderer = ParticleRenderer(self.ctx, PARTICLE_CAPACITY)
         self.all_sprites = arcade.SpriteList()
+        self.swarm = BulletSwarm(SWARM_CAPACITY, split_on_bounce=SPLIT_ON_BOUNCE)
+        self.swarm_renderer = SwarmRenderer(SWARM_CAPACITY, 5, arcade.color.YELLOW)
+        # пакетная физика для роя строится при первом веере в комнате
+        self.swarm_sim = None
+        self.swarm_enabled = False
         self.bullet_sprite = None
+        self.physics_clock = FixedStepClock(PHYSICS_RATE, MAX_SUBSTEPS)
+        # положение пули до последнего шага физики — для интерполяции в on_draw;
+        # и оно, и линия прицела обновляются на месте, без нового кортежа за кадр
+        self.prev_bullet_pos = [0.0, 0.0]
+        # дробный остаток частиц следа, когда PHYSICS_RATE не 60
+        self.particle_carry = 0.0
 
         self.aim_line = None
+        self.aim_buffer = [0.0, 0.0, 0.0, 0.0]
+        self.preview = None
+        self.preview_enabled = False
+        self.preview_path = None
+        self.preview_goal = False
 
         self.cooldown = 0
         self.last_shield_time = 0
@@ -255,9 +385,27 @@ class GameWindow(arcade.Window):
         self._mouse_x = 0
         self._mouse_y = 0
 
+        self.first_frame_drawn = False
+        self.mark("интерфейс")
+
+        self.save_writer = SaveWriter(SAVE_FILE)
+
+        try:
+            self.level_pack = LevelPack.load(LEVEL_PACK_FILE, COLS, ROWS, CELL, WALL)
+        except (ValueError, KeyError) as e:
+            print("Набор уровней не подходит:", e)
+            self.level_pack = None
+
         # Пытаемся загрузить прогресс
         loaded = self.load_progress()
 
+        # заготовки начинаются с комнаты, которая понадобится следующей
+        self.prefetcher = RoomPrefetcher(
+            self.build_next_room,
+            PREFETCH_ROOMS,
+            first=self.room_number + 1 if loaded else 1,
+        )
+
         if not loaded:
             # Прогресса нет — создаем новый лабиринт
             self.room_number = 1
@@ -266,17 +414,15 @@ class GameWindow(arcade.Window):
         else:
             # Прогресс загружен — пересчитываем таймер с момента сохранения
             self.level_start_time = time.time() - self.level_time
+        self.mark("сохранение и комната")
 
 
     def save_progress(self):
         data = {
+            "format": SAVE_FORMAT,
             "room_number": self.room_number,
             "level_time": self.level_time,  # сохраняем пройденное время
-            "vertical_walls": self.vertical_walls,
-            "horizontal_walls": self.horizontal_walls,
             "start_rect": self.start_rect,
-            "end_rect": self.end_rect,
-            "bullet_active": self.bullet_active,
             "bullet": {
                 "x": self.bullet.x,
                 "y": self.bullet.y,
@@ -289,11 +435,17 @@ class GameWindow(arcade.Window):
             "shield_active": self.shield_active,
         }
 
-        try:
-            with open(SAVE_FILE, "w") as f:
-                json.dump(data, f)
-        except Exception as e:
-            print("Ошибка сохранения:", e)
+        if self.maze is not None and self.maze.seed is not None:
+            # стены не пишем: лабиринт заново строится по seed
+            data["maze"] = self.maze.to_save()
+        else:
+            data["vertical_walls"] = self.vertical_walls
+            data["horizontal_walls"] = self.horizontal_walls
+            data["end_rect"] = self.end_rect
+
+        # запись идёт в фоновом потоке, кадр не ждёт диска
+        with self.frame_profiler.span("сохранение"):
+            self.save_writer.submit(data)
 
 
 
@@ -310,44 +462,46 @@ class GameWindow(arcade.Window):
             self.level_time = data.get("level_time", 0)  # сохраняем пройденное время
             self.level_start_time = time.time() - self.level_time  # корректируем таймер
 
-            self.vertical_walls = [tuple(v) for v in data.get("vertical_walls", [])]
-            self.horizontal_walls = [tuple(h) for h in data.get("horizontal_walls", [])]
-            self.start_rect = tuple(data.get("start_rect")) if data.get("start_rect") is not None else None
-            self.end_rect = tuple(data.get("end_rect")) if data.get("end_rect") is not None else None
+            if "maze" in data:
+                self.maze = Maze.from_save(data["maze"], CELL, WALL)
+                if (self.maze.cols, self.maze.rows) != (COLS, ROWS):
+                    raise ValueError("сохранён лабиринт другого размера")
+            else:
+                # старый формат со списками стен; отдельные отрезки
+                # при этом сливаются в длинные прямоугольники
+                self.maze = Maze.from_rects(
+                    COLS,
+                    ROWS,
+                    CELL,
+                    WALL,
+                    data.get("vertical_walls", []),
+                    data.get("horizontal_walls", []),
+                )
+            self.vertical_walls = self.maze.vertical_rects()
+            self.horizontal_walls = self.maze.horizontal_rects()
+            self.start_rect = tuple(data["start_rect"]) if data.get("start_rect") else default_start_rect()
+            self.end_rect = tuple(data["end_rect"]) if data.get("end_rect") else default_end_rect()
+
 
+            self.cooldown = data.get("cooldown", 0)
+            self.last_shield_time = data.get("last_shield_time", 0)
+            self.shield_active = data.get("shield_active", False)
+
+            self.enter_room(self.make_room(self.maze, self.start_rect, self.end_rect))
 
-            self.bullet_active = data.get("bullet_active", False)
+            # bullet_active в файле не нужен: пуля активна, если она сохранена
             bullet_data = data.get("bullet", None)
             if bullet_data:
-                # Bullet -> BulletSprite (в коде у вас класс называется BulletSprite)
-                self.bullet = BulletSprite(
+                self.sim.bullet = Bullet(
                     bullet_data["x"],
                     bullet_data["y"],
                     bullet_data["dx"],
                     bullet_data["dy"],
                     radius=bullet_data.get("radius", 5),
                 )
-                # Добавляем спрайт в список отрисовки, если нужно
-                try:
-                    # убедимся, что список существует
-                    self.all_sprites.append(self.bullet)
-                except Exception:
-                    self.all_sprites = arcade.SpriteList()
-                    self.all_sprites.append(self.bullet)
-
-                self.bullet_sprite = self.bullet
-                self.bullet_active = True
-            else:
-                self.bullet = None
-                self.bullet_sprite = None
-                # оставляем bullet_active как в файле (можно явно сбросить)
-                # self.bullet_active = False
-
-
-            self.cooldown = data.get("cooldown", 0)
-            self.last_shield_time = data.get("last_shield_time", 0)
-            self.shield_active = data.get("shield_active", False)
-
+                self.spawn_bullet_sprite()
+                if self.recorder:
+                    self.recorder.set_bullet(self.sim.bullet)
             return True
 
         except Exception as e:
@@ -357,187 +511,180 @@ class GameWindow(arcade.Window):
 
 
     def generate_maze(self):
-        self.vertical_walls.clear()
-        self.horizontal_walls.clear()
         self.level_start_time = time.time()
 
-
-        v_walls = [[True for _ in range(COLS + 1)] for _ in range(ROWS)]
-        h_walls = [[True for _ in range(COLS)] for _ in range(ROWS + 1)]
-        visited = [[False for _ in range(COLS)] for _ in range(ROWS)]
-
-        def dfs(r, c):
-            visited[r][c] = True
-            directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
-            random.shuffle(directions)
-            for dr, dc in directions:
-                nr, nc = r + dr, c + dc
-                if 0 <= nr < ROWS and 0 <= nc < COLS and not visited[nr][nc]:
-                    if dr == 0 and dc == 1:
-                        v_walls[r][c + 1] = False
-                    elif dr == 0 and dc == -1:
-                        v_walls[r][c] = False
-                    elif dr == 1 and dc == 0:
-                        h_walls[r + 1][c] = False
-                    elif dr == -1 and dc == 0:
-                        h_walls[r][c] = False
-                    dfs(nr, nc)
-
-        dfs(0, 0)
-
-        for r in range(ROWS):
-            for c in range(COLS + 1):
-                if v_walls[r][c]:
-                    self.vertical_walls.append(
-                        center_to_lbwh(
-                            c * CELL + WALL / 2, r * CELL + CELL / 2, WALL, CELL
-                        )
-                    )
-
-        for r in range(ROWS + 1):
-            for c in range(COLS):
-                if h_walls[r][c]:
-                    self.horizontal_walls.append(
-                        center_to_lbwh(
-                            c * CELL + CELL / 2, r * CELL + WALL / 2, CELL, WALL
-                        )
-                    )
-
-        self.start_rect = center_to_lbwh(
-            WALL + PASSAGE / 2, WALL + PASSAGE / 2, START_SIZE, START_SIZE
-        )
-        self.end_rect = center_to_lbwh(
-            MAZE_WIDTH - WALL - PASSAGE / 2,
-            MAZE_HEIGHT - WALL - PASSAGE / 2,
-            END_SIZE,
-            END_SIZE,
-        )
+        # комната уже построена в фоне, здесь она только подменяет текущую
+        with self.frame_profiler.span("комната"):
+            self.enter_room(self.prefetcher.take(self.room_number))
 
         self.room_text = f"Комната: {self.room_number}"
-        self.bullet_active = False
-        self.bullet = None
         self.aim_line = None
         self.shield_active = False
 
-        
-        
-
-
-    def on_draw(self):
-        self.clear()
-
-        
-        if self.show_start_screen:
-            arcade.draw_text(
-                "bullet in the mosaic",
-                SCREEN_WIDTH // 2,
-                SCREEN_HEIGHT // 2 + 90,
-                TITLE_COLOR,
-                36,
-                anchor_x="center",
-            )
-
-            
-            self.draw_button(self.start_continue_button, "Продолжить прохождение")
-            self.draw_button(self.start_new_button, "Начать заново")
-            return
-
-        
-        _draw_rectangle_filled_center(
-            SCREEN_WIDTH // 2,
-            self.hud_y,
-            SCREEN_WIDTH,
-            HUD_HEIGHT,
-            HUD_COLOR,
+    def make_room(self, maze, start_rect, end_rect, lazy=False):
+        # без GL-вызовов при lazy=True, поэтому годится и для фонового потока
+        walls = maze.vertical_rects() + maze.horizontal_rects()
+        field = DistanceField(walls, MAZE_WIDTH, MAZE_HEIGHT, SDF_RESOLUTION, CELL)
+        sim = Simulation(
+            walls,
+            start_rect,
+            end_rect,
+            CELL,
+            COLS,
+            ROWS,
+            continuous=CONTINUOUS_COLLISION,
+            field=field,
         )
-
-        
-        arcade.draw_text(
-            f"Комната: {self.room_number}",
-            *self.room_text_pos,
-            arcade.color.BLACK,
-            16,
-            anchor_y="center",
+        batch = RoomBatch(
+            sim.walls,
+            start_rect,
+            end_rect,
+            self.start_texture,
+            WALL_COLOR,
+            END_COLOR,
+            lazy=lazy,
+            chunk=CHUNK_CELLS * CELL,
         )
+        return Room(maze, start_rect, end_rect, sim, AimRaycaster(sim.index), batch)
+
+    def build_next_room(self, number):
+        # вызывается из потока RoomPrefetcher; после конца набора — случайные комнаты
+        maze = self.level_pack.maze(number, CELL, WALL) if self.level_pack else None
+        if maze is None:
+            maze = Maze.generate(COLS, ROWS, CELL, WALL)
+        return self.make_room(maze, default_start_rect(), default_end_rect(), lazy=True)
+
+    def enter_room(self, room):
+        self.finish_recording("goal" if self.recorder and self.recorder.goal else "skip")
+        # пуля старой комнаты пропадает вместе с ней
+        self.remove_bullet_sprite()
+        # комнату могли собрать, пока вместо текстуры старта была заглушка
+        room.batch.set_start_texture(self.start_texture)
+        self.maze = room.maze
+        self.vertical_walls = room.vertical_walls
+        self.horizontal_walls = room.horizontal_walls
+        self.start_rect = room.start_rect
+        self.end_rect = room.end_rect
+        self.sim = room.sim
+        self.raycaster = room.raycaster
+        self.room_batch = room.batch
+        self.preview = TrajectoryPreview(room.sim, BULLET_STEP_SPEED, PREVIEW_BOUNCES)
+        self.preview_path = None
+        self.swarm.clear()
+        self.swarm_sim = None
+        self.camera.jump(*self.sim.start_point())
+        # комнаты из старых сохранений без seed не записываются: их не повторить
+        self.recorder = None
+        if room.maze.seed is not None:
+            self.recorder = RoomRecorder(
+                room.maze, room.start_rect, room.end_rect, CELL, WALL, CONTINUOUS_COLLISION
+            )
 
-        
-        arcade.draw_text(
-            f"{self.level_time:.1f} сек",
-            *self.timer_pos,
-            arcade.color.BLACK,
-            16,
-            anchor_x="center",
-            anchor_y="center",
-        )
+    def finish_recording(self, reason):
+        if self.recorder:
+            self.replay_log.append(self.recorder.finish(reason, self.bullet))
+            self.recorder = None
 
-        
-        shield_text = (
-            f"Стоп пуля ({self.get_cooldown()})"
-            if self.cooldown > 0
-            else "Остановить пулю"
-        )
+    def set_start_texture(self, texture):
+        self.start_texture = texture
+        if self.room_batch:
+            self.room_batch.set_start_texture(texture)
 
-        self.draw_button(self.shield_button, shield_text)
-        self.draw_button(self.menu_button, "Главное меню")
+    def mark(self, phase):
+        if self.profile:
+            self.profile.mark(phase)
 
-        
-        for x, y, w, h in self.vertical_walls + self.horizontal_walls:
-            _draw_rectangle_filled_center(x + w / 2, y + h / 2, w, h, WALL_COLOR)
+    @property
+    def bullet(self):
+        return self.sim.bullet if self.sim else None
 
-        
-        sx, sy, sw, sh = self.start_rect
-        # Нарисовать текстуру: первый аргумент — texture, второй — rect (здесь используем arcade.XYWH)
-        arcade.draw_texture_rect(
-                self.start_texture,
-                arcade.XYWH(sx + sw / 2, sy + sh / 2, sw, sh)
-        )
+    @property
+    def bullet_active(self):
+        return self.bullet is not None
+
+    def spawn_bullet_sprite(self):
+        b = self.bullet
+        self.remove_bullet_sprite()
+        self.bullet_sprite = BulletSprite(b.x, b.y, b.dx, b.dy, radius=b.radius)
+        self.all_sprites.append(self.bullet_sprite)
+        self.prev_bullet_pos[0] = b.x
+        self.prev_bullet_pos[1] = b.y
+
+    def remove_bullet_sprite(self):
+        if self.bullet_sprite and self.bullet_sprite in self.all_sprites:
+            self.all_sprites.remove(self.bullet_sprite)
+        self.bullet_sprite = None
 
 
+    def on_draw(self):
+        self.clear()
+        self.draw_frame()
+        if not self.first_frame_drawn:
+            self.first_frame_drawn = True
+            self.mark("первый кадр")
+
+        prof = self.frame_profiler
+        if prof.enabled:
+            if self.sim:
+                tested = self.sim.walls_tested
+                # у новой комнаты счётчик начинается с нуля
+                prof.count("стен проверено", tested - min(self._walls_tested_seen, tested))
+                self._walls_tested_seen = tested
+            prof.gauge("частиц", len(self.particles))
+            prof.gauge("пуль в рое", len(self.swarm))
+            prof.end_frame()
+            self.profiler_overlay.update(prof, time.perf_counter())
+            self.profiler_overlay.draw()
+
+    def draw_frame(self):
+        if self.show_start_screen:
+            self.start_menu.draw()
+            return
+
+        span = self.frame_profiler.span
+        with span("отрисовка HUD"):
+            self.hud.update(self.room_number, self.level_time, self.get_cooldown())
+            self.hud.draw()
 
+        # мир рисуется через камеру, HUD — в координатах экрана
+        with self.camera.activate():
+            self.draw_world()
 
+    def draw_world(self):
+        span = self.frame_profiler.span
+        with span("отрисовка"):
+            # стены кусками: только те, что попадают в камеру
+            self.room_batch.draw(self.camera.view())
 
-        ex, ey, ew, eh = self.end_rect
-        _draw_rectangle_filled_center(ex + ew / 2, ey + eh / 2, ew, eh, END_COLOR)
+            if self.preview_path:
+                color = arcade.color.GREEN if self.preview_goal else arcade.color.ORANGE
+                arcade.draw_line_strip(self.preview_path, color, 2)
+            elif self.aim_line:
+                arcade.draw_line(*self.aim_line, arcade.color.RED, 3)
 
-        
-        if self.aim_line:
-            arcade.draw_line(*self.aim_line, arcade.color.RED, 3)
+        with span("отрисовка частиц"):
+            self.particle_renderer.draw(self.particles)
 
-        for p in self.particles:
-            p.draw()
+        with span("отрисовка роя"):
+            self.swarm_renderer.draw(self.swarm, self.physics_clock.alpha)
 
         if self.bullet_active and self.bullet_sprite:
+            # между шагами физики рисуем пулю в промежуточной точке
+            b = self.bullet
+            alpha = self.physics_clock.alpha
+            px, py = self.prev_bullet_pos
+            self.bullet_sprite.center_x = px + (b.x - px) * alpha
+            self.bullet_sprite.center_y = py + (b.y - py) * alpha
             self.all_sprites.draw()
 
 
 
 
-    def draw_button(self, rect, text):
-        x, y, w, h = rect
-        color = BUTTON_COLOR
-        if x < self._mouse_x < x + w and y < self._mouse_y < y + h:
-            color = BUTTON_HOVER_COLOR
-        _draw_rectangle_filled_center(x + w / 2, y + h / 2, w, h, color)
-        arcade.draw_text(
-            text,
-            x + w / 2,
-            y + h / 2,
-            BUTTON_TEXT_COLOR,
-            14,
-            anchor_x="center",
-            anchor_y="center",
-        )
-
-
-
-
-    def play_bounce(self):
-        if not self.bounce_sound:
-            return
-
-        speed = math.hypot(self.bullet.dx, self.bullet.dy)
-        volume = min(0.2 + speed / 50, 0.6)
-        arcade.play_sound(self.bounce_sound, volume=volume)
+    def play_bounce(self, speed):
+        # speed — пикселей за шаг физики; громкость считается по шагу в 60 Гц
+        volume = min(0.2 + speed * PHYSICS_RATE / 60 / 50, 0.6)
+        with self.frame_profiler.span("звук"):
+            self.sound.play("bounce", volume)
 
 
 
@@ -553,6 +700,13 @@ class GameWindow(arcade.Window):
         return remaining
 
     def on_update(self, delta_time):
+        self.assets.poll()
+        if self.profile and self.first_frame_drawn and not self.assets.pending:
+            # --profile-startup: всё загружено — отчёт и выход
+            self.profile.note("декодирование ассетов", self.assets.decode_time)
+            print(self.profile.report())
+            self.on_close()
+            return
 
         if self.show_start_screen or self.paused:
             return
@@ -563,240 +717,97 @@ class GameWindow(arcade.Window):
         sx, sy, sw, sh = self.start_rect
         start_x = sx + sw / 2
         start_y = sy + sh / 2
-        mx, my = self._mouse_x, self._mouse_y
-
-        raw_dx = mx - start_x
-        raw_dy = my - start_y
-        raw_dist = math.hypot(raw_dx, raw_dy)
-        if raw_dist == 0:
-            unit_dx, unit_dy = 1.0, 0.0
+        mx, my = self.camera.to_world(self._mouse_x, self._mouse_y)
+
+        with self.frame_profiler.span("прицел"):
+            hit_x, hit_y = self.raycaster.cast(start_x, start_y, mx, my)
+
+        aim = self.aim_buffer
+        aim[0] = start_x
+        aim[1] = start_y
+        aim[2] = hit_x
+        aim[3] = hit_y
+        self.aim_line = aim
+
+        if self.preview_enabled and not self.bullet_active:
+            with self.frame_profiler.span("предпросмотр"):
+                self.preview_path, self.preview_goal = self.preview.path(
+                    start_x, start_y, mx, my
+                )
         else:
-            unit_dx, unit_dy = raw_dx / raw_dist, raw_dy / raw_dist
-
-        max_distance = 5000.0
-        closest_t = max_distance
-        hit_x = start_x + unit_dx * max_distance
-        hit_y = start_y + unit_dy * max_distance
-
-        walls = self.vertical_walls + self.horizontal_walls
-        for wx, wy, ww, wh in walls:
-            wall_left = wx
-            wall_right = wx + ww
-            wall_bottom = wy
-            wall_top = wy + wh
-
-            if abs(unit_dx) > 1e-9:
-                for x_side in (wall_left, wall_right):
-                    t = (x_side - start_x) / unit_dx
-                    if t > 0 and t < closest_t:
-                        y_hit = start_y + unit_dy * t
-                        if wall_bottom - 1e-6 <= y_hit <= wall_top + 1e-6:
-                            closest_t = t
-                            hit_x = x_side
-                            hit_y = y_hit
-
-            if abs(unit_dy) > 1e-9:
-                for y_side in (wall_bottom, wall_top):
-                    t = (y_side - start_y) / unit_dy
-                    if t > 0 and t < closest_t:
-                        x_hit = start_x + unit_dx * t
-                        if wall_left - 1e-6 <= x_hit <= wall_right + 1e-6:
-                            closest_t = t
-                            hit_x = x_hit
-                            hit_y = y_side
-
-        self.aim_line = (start_x, start_y, hit_x, hit_y)
-
-        if self.bullet_active and self.bullet:
-            for _ in range(2):
-                self.particles.append(Particle(self.bullet.x, self.bullet.y))
-
-            b = self.bullet
-            new_x = b.x
-            new_y = b.y
-
-            tentative_x = b.x + b.dx
-            tentative_y = b.y + b.dy
-
-            radius = b.radius
-
-            nearest_x_collision = None
-            nearest_x_dist = float("inf")
-            if b.dx > 0:
-                for wx, wy, ww, wh in walls:
-                    wall_left = wx
-                    wall_right = wx + ww
-                    wall_bottom = wy
-                    wall_top = wy + wh
-                    if new_y + radius > wall_bottom and new_y - radius < wall_top:
-                        collision_x = wall_left - radius
-                        if new_x < collision_x <= tentative_x:
-                            dist = collision_x - new_x
-                            if dist < nearest_x_dist:
-                                nearest_x_dist = dist
-                                nearest_x_collision = (
-                                    collision_x,
-                                    wall_left,
-                                    wall_right,
-                                    wall_bottom,
-                                    wall_top,
-                                )
-            elif b.dx < 0:
-                for wx, wy, ww, wh in walls:
-                    wall_left = wx
-                    wall_right = wx + ww
-                    wall_bottom = wy
-                    wall_top = wy + wh
-                    if new_y + radius > wall_bottom and new_y - radius < wall_top:
-                        collision_x = wall_right + radius
-                        if tentative_x <= collision_x < new_x:
-                            dist = new_x - collision_x
-                            if dist < nearest_x_dist:
-                                nearest_x_dist = dist
-                                nearest_x_collision = (
-                                    collision_x,
-                                    wall_left,
-                                    wall_right,
-                                    wall_bottom,
-                                    wall_top,
-                                )
-
-            if nearest_x_collision:
-
-                (
-                    col_x,
-                    wall_left,
-                    wall_right,
-                    wall_bottom,
-                    wall_top,
-                ) = nearest_x_collision
-                new_x = col_x
-                b.dx *= -1
-                self.play_bounce()
-            else:
-                new_x = tentative_x
-
-            nearest_y_collision = None
-            nearest_y_dist = float("inf")
-            if b.dy > 0:
-                for wx, wy, ww, wh in walls:
-                    wall_left = wx
-                    wall_right = wx + ww
-                    wall_bottom = wy
-                    wall_top = wy + wh
-                    if new_x + radius > wall_left and new_x - radius < wall_right:
-                        collision_y = wall_bottom - radius
-                        if new_y < collision_y <= tentative_y:
-                            dist = collision_y - new_y
-                            if dist < nearest_y_dist:
-                                nearest_y_dist = dist
-                                nearest_y_collision = (
-                                    collision_y,
-                                    wall_left,
-                                    wall_right,
-                                    wall_bottom,
-                                    wall_top,
-                                )
-            elif b.dy < 0:
-                for wx, wy, ww, wh in walls:
-                    wall_left = wx
-                    wall_right = wx + ww
-                    wall_bottom = wy
-                    wall_top = wy + wh
-                    if new_x + radius > wall_left and new_x - radius < wall_right:
-                        collision_y = wall_top + radius
-                        if tentative_y <= collision_y < new_y:
-                            dist = new_y - collision_y
-                            if dist < nearest_y_dist:
-                                nearest_y_dist = dist
-                                nearest_y_collision = (
-                                    collision_y,
-                                    wall_left,
-                                    wall_right,
-                                    wall_bottom,
-                                    wall_top,
-                                )
-
-            if nearest_y_collision:
-                (
-                    col_y,
-                    wall_left,
-                    wall_right,
-                    wall_bottom,
-                    wall_top,
-                ) = nearest_y_collision
-                new_y = col_y
-                b.dy *= -1
-                self.play_bounce()
-            else:
-                new_y = tentative_y
-
-            pushed_out = False
-            for wx, wy, ww, wh in walls:
-                wall_left = wx
-                wall_right = wx + ww
-                wall_bottom = wy
-                wall_top = wy + wh
-                if (
-                    new_x + radius > wall_left
-                    and new_x - radius < wall_right
-                    and new_y + radius > wall_bottom
-                    and new_y - radius < wall_top
-                ):
-                    overlap_left = abs((new_x + radius) - wall_left)
-                    overlap_right = abs(wall_right - (new_x - radius))
-                    overlap_bottom = abs((new_y + radius) - wall_bottom)
-                    overlap_top = abs(wall_top - (new_y - radius))
-                    min_overlap = min(
-                        overlap_left, overlap_right, overlap_bottom, overlap_top
-                    )
-                    if min_overlap == overlap_left:
-                        new_x = wall_left - radius
-                        b.dx = -abs(b.dx)
-                    elif min_overlap == overlap_right:
-                        new_x = wall_right + radius
-                        b.dx = abs(b.dx)
-                    elif min_overlap == overlap_bottom:
-                        new_y = wall_bottom - radius
-                        b.dy = -abs(b.dy)
-                    else:
-                        new_y = wall_top + radius
-                        b.dy = abs(b.dy)
-                    pushed_out = True
-
-            if not pushed_out:
-                b.x = new_x
-                b.y = new_y
-            else:
-                b.x = new_x
-                b.y = new_y
-
-            ex, ey, ew, eh = self.end_rect
-            if ex <= b.x <= ex + ew and ey <= b.y <= ey + eh:
-                # прошли уровень
-                self.room_number += 1
-                self.save_progress()
-                self.level_time = 0
-                self.generate_maze()
-
-                # выключаем пулю и удаляем спрайт
-                self.bullet_active = False
-                self.bullet = None
-                if self.bullet_sprite and self.bullet_sprite in self.all_sprites:
-                    self.all_sprites.remove(self.bullet_sprite)
-                self.bullet_sprite = None
-
-                # очистка частиц
-                self.particles.clear()
-
-
+            self.preview_path = None
+
+        steps = self.physics_clock.tick(delta_time)
+        for _ in range(steps):
+            if not self.bullet_active and not len(self.swarm):
+                break
+            self.physics_step()
+
+        # камера держит в кадре пулю (или рой), а без них — старт и точку прицела
+        if self.bullet_active:
+            self.camera.follow(self.bullet.x, self.bullet.y, delta_time)
+        elif len(self.swarm):
+            n = self.swarm.count
+            self.camera.follow(
+                float(self.swarm.x[:n].mean()), float(self.swarm.y[:n].mean()), delta_time
+            )
+        else:
+            self.camera.follow((start_x + mx) / 2, (start_y + my) / 2, delta_time)
+
+    def physics_step(self):
+        if self.bullet_active:
+            self.bullet_step()
+        if len(self.swarm):
+            self.swarm_step()
+
+        with self.frame_profiler.span("частицы"):
+            self.particles.update(self.physics_clock.dt)
+
+    def bullet_step(self):
+        span = self.frame_profiler.span
+        b = self.bullet
+        self.prev_bullet_pos[0] = b.x
+        self.prev_bullet_pos[1] = b.y
+        with span("частицы"):
+            self.particle_carry += PARTICLES_PER_STEP * 60 / PHYSICS_RATE
+            n = int(self.particle_carry)
+            if n:
+                self.particle_carry -= n
+                self.particles.emit(b.x, b.y, n)
+        speed = math.hypot(b.dx, b.dy)
+
+        with span("физика"):
+            events = self.sim.step()
+        if self.recorder:
+            self.recorder.advance(events)
+
+        for event in events:
+            if event.kind == BOUNCE:
+                self.frame_profiler.count("отскоков")
+                self.play_bounce(speed)
+            elif event.kind == GOAL:
+                self.complete_room()
+
+    def swarm_step(self):
+        with self.frame_profiler.span("рой"):
+            if self.swarm_sim is None:
+                self.swarm_sim = BatchSimulator(
+                    self.sim.walls, CELL, COLS, ROWS, max_speed=BULLET_STEP_SPEED
+                )
+            bounces, _ = self.swarm.step(self.swarm_sim, self.end_rect)
 
-            # --- обновление частиц ---
-            for p in self.particles[:]:
-                p.update(delta_time)
-                if p.life <= 0:
-                    self.particles.remove(p)
+        if bounces:
+            self.frame_profiler.count("отскоков", bounces)
+            # звуков всё равно не больше лимита SoundManager
+            self.play_bounce(BULLET_STEP_SPEED)
 
+    def complete_room(self):
+        # прошли уровень
+        self.room_number += 1
+        self.level_time = 0
+        self.generate_maze()
+        self.save_progress()
+        self.particles.clear()
 
     def on_key_press(self, key, modifiers):
         # Если на стартовом экране — убираем его и корректируем таймер
@@ -812,9 +823,23 @@ class GameWindow(arcade.Window):
             self.room_number += 1
             self.generate_maze()
 
-        # Выход из игры
+        if key == arcade.key.T:
+            self.preview_enabled = not self.preview_enabled
+
+        if key == arcade.key.M:
+            self.swarm_enabled = not self.swarm_enabled
+            if not self.swarm_enabled:
+                self.swarm.clear()
+
+        if key == arcade.key.F3:
+            self.frame_profiler.toggle()
+
+        if key == arcade.key.F4:
+            self.frame_profiler.dump(self.trace_file or TRACE_FILE)
+
+        # Выход из игры: close() сам on_close не вызывает — сохранение и запись комнаты там
         if key == arcade.key.ESCAPE:
-            self.close()
+            self.on_close()
 
 
     def on_mouse_press(self, x, y, button, modifiers):
@@ -827,8 +852,7 @@ class GameWindow(arcade.Window):
                 self.paused = False
 
             elif self.point_in_rect(x, y, self.start_new_button):
-                if os.path.exists(SAVE_FILE):
-                    os.remove(SAVE_FILE)
+                self.save_writer.delete()
 
                 self.room_number = 1
                 self.level_start_time = time.time()
@@ -840,18 +864,15 @@ class GameWindow(arcade.Window):
 
         # --- Кнопка "Стоп пуля" ---
         if self.point_in_rect(x, y, self.shield_button) and self.cooldown == 0:
-            if self.bullet_active and self.bullet:
-                cx, cy, w, h = self.start_rect
-                self.start_rect = center_to_lbwh(self.bullet.x, self.bullet.y, w, h)
-
-                # выключаем пулю в логике
-                self.bullet_active = False
-                self.bullet = None
-
-                # убираем спрайт из списка отрисовки, если он там есть
-                if self.bullet_sprite and self.bullet_sprite in self.all_sprites:
-                    self.all_sprites.remove(self.bullet_sprite)
-                self.bullet_sprite = None
+            if self.bullet_active:
+                # переносим старт туда, где была пуля, и выключаем её
+                if self.recorder:
+                    self.recorder.stop(self.bullet)
+                self.sim.stop(move_start=True)
+                self.start_rect = self.sim.start_rect
+                self.room_batch.move_start(self.start_rect)
+                self.remove_bullet_sprite()
+            self.swarm.clear()
 
             self.cooldown = COOLDOWN_MAX
             self.last_shield_time = time.time()
@@ -867,32 +888,30 @@ class GameWindow(arcade.Window):
 
         # --- Запуск пули ---
         else:
-            if not self.bullet_active:
+            if button == arcade.MOUSE_BUTTON_RIGHT and self.swarm_enabled:
+                # веер из пуль роя; основную пулю не трогает
+                x, y = self.camera.to_world(x, y)
+                start_x, start_y = self.sim.start_point()
+                self.swarm.spread(
+                    start_x, start_y, x - start_x, y - start_y,
+                    SPREAD_COUNT, SPREAD_ANGLE, BULLET_STEP_SPEED,
+                )
+            elif not self.bullet_active:
                 self.particles.clear()
-                sx, sy, sw, sh = self.start_rect
-                start_x = sx + sw / 2
-                start_y = sy + sh / 2
-                dx = x - start_x
-                dy = y - start_y
-                length = math.hypot(dx, dy)
-                if length != 0:
-                    dx /= length
-                    dy /= length
-                    speed = 10
-                    self.bullet_sprite = BulletSprite(start_x, start_y, dx * speed, dy * speed, radius=5)
-                    self.all_sprites.append(self.bullet_sprite)  # добавляем в список спрайтов
-                    # синхронизируем старую логику с новым спрайтом:
-                    self.bullet = self.bullet_sprite
-                    self.bullet_active = True
+                x, y = self.camera.to_world(x, y)
+                start_x, start_y = self.sim.start_point()
+                if self.sim.launch(x - start_x, y - start_y, speed=BULLET_STEP_SPEED):
+                    if self.recorder:
+                        self.recorder.launch(x - start_x, y - start_y, BULLET_STEP_SPEED)
+                    self.spawn_bullet_sprite()
                     self.aim_line = None
 
 
-                
-
-
     def on_mouse_motion(self, x, y, dx, dy):
         self._mouse_x = x
         self._mouse_y = y
+        self.hud.hover(x, y)
+        self.start_menu.hover(x, y)
 
     @staticmethod
     def point_in_rect(px, py, rect):
@@ -900,13 +919,49 @@ class GameWindow(arcade.Window):
         return x <= px <= x + w and y <= py <= y + h
     
     def on_close(self):
-        self.save_progress()
+        # сюда приходят и крестик окна, и Esc, и конец --profile-startup
+        if self.closing:
+            return
+        self.closing = True
+        # замер запуска не должен менять сохранение
+        if not self.profile:
+            self.save_progress()
+            self.finish_recording("quit")
+        self.save_writer.close()
+        self.replay_log.close()
+        if self.trace_file:
+            self.frame_profiler.dump(self.trace_file)
+        self.prefetcher.close()
+        self.assets.close()
+        self.sound.close()
         super().on_close()
 
 
 
 def main():
-    window = GameWindow()
+    parser = argparse.ArgumentParser(description=WINDOW_TITLE)
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="показать время до первого кадра по этапам и выйти",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="замерять фазы кадра с запуска и при выходе записать Chrome trace",
+    )
+    parser.add_argument(
+        "--trace-frames",
+        type=int,
+        default=TRACE_FRAMES,
+        help="сколько последних кадров хранить для trace и оверлея",
+    )
+    args = parser.parse_args()
+
+    profile = StartupProfile(STARTED) if args.profile_startup else None
+    if profile:
+        profile.mark("импорт")
+    window = GameWindow(profile, args.trace, args.trace_frames)
     arcade.run()
 
 
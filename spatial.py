@@ -0,0 +1,90 @@
+"""Пространственный индекс стен лабиринта: равномерная сетка по клеткам."""
+
+import math
+
+
+class WallIndex:
+    """
+    Каждая клетка сетки хранит номера стен, которые её касаются.
+    walls - список прямоугольников (x, y, w, h)
+    cell - размер клетки сетки (обычно CELL)
+    cols, rows - размеры лабиринта в клетках
+    """
+
+    def __init__(self, walls, cell, cols, rows):
+        self.walls = list(walls)
+        self.cell = cell
+        # внешние стены (x = cols * CELL) попадают в дополнительный столбец/строку
+        self.cols = cols + 1
+        self.rows = rows + 1
+        self.cells = [[] for _ in range(self.cols * self.rows)]
+        # сколько стен отдано на проверку за всё время (для профайлера)
+        self.tested = 0
+
+        for i, (x, y, w, h) in enumerate(self.walls):
+            c0, r0, c1, r1 = self._cell_range(x, y, x + w, y + h)
+            for r in range(r0, r1 + 1):
+                base = r * self.cols
+                for c in range(c0, c1 + 1):
+                    self.cells[base + c].append(i)
+
+    def _cell_range(self, left, bottom, right, top):
+        cell = self.cell
+        c0 = min(max(int(left // cell), 0), self.cols - 1)
+        c1 = min(max(int(right // cell), 0), self.cols - 1)
+        r0 = min(max(int(bottom // cell), 0), self.rows - 1)
+        r1 = min(max(int(top // cell), 0), self.rows - 1)
+        return c0, r0, c1, r1
+
+    def query(self, left, bottom, right, top, margin=1):
+        """
+        Стены из клеток, которых касается прямоугольник, плюс margin клеток вокруг.
+        Порядок совпадает с исходным списком стен — от него зависит выталкивание.
+        """
+        c0, r0, c1, r1 = self._cell_range(left, bottom, right, top)
+        c0 = max(c0 - margin, 0)
+        r0 = max(r0 - margin, 0)
+        c1 = min(c1 + margin, self.cols - 1)
+        r1 = min(r1 + margin, self.rows - 1)
+
+        found = set()
+        for r in range(r0, r1 + 1):
+            base = r * self.cols
+            for c in range(c0, c1 + 1):
+                found.update(self.cells[base + c])
+        self.tested += len(found)
+        return [self.walls[i] for i in sorted(found)]
+
+    def ray_cells(self, x, y, dx, dy):
+        """
+        Обход клеток вдоль луча (x, y) + t * (dx, dy) по порядку (DDA).
+        Отдаёт (номера стен клетки, t выхода из клетки); t в единицах (dx, dy).
+        """
+        cell = self.cell
+        cols = self.cols
+        rows = self.rows
+        c = int(x // cell)
+        r = int(y // cell)
+
+        if dx > 0:
+            step_c, t_max_x, t_delta_x = 1, ((c + 1) * cell - x) / dx, cell / dx
+        elif dx < 0:
+            step_c, t_max_x, t_delta_x = -1, (c * cell - x) / dx, -cell / dx
+        else:
+            step_c, t_max_x, t_delta_x = 0, math.inf, math.inf
+
+        if dy > 0:
+            step_r, t_max_y, t_delta_y = 1, ((r + 1) * cell - y) / dy, cell / dy
+        elif dy < 0:
+            step_r, t_max_y, t_delta_y = -1, (r * cell - y) / dy, -cell / dy
+        else:
+            step_r, t_max_y, t_delta_y = 0, math.inf, math.inf
+
+        while 0 <= c < cols and 0 <= r < rows:
+            yield self.cells[r * cols + c], min(t_max_x, t_max_y)
+            if t_max_x < t_max_y:
+                c += step_c
+                t_max_x += t_delta_x
+            else:
+                r += step_r
+                t_max_y += t_delta_y
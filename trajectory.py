@@ -0,0 +1,101 @@
+"""Предпросмотр полёта пули через несколько отскоков, с кэшем и досчётом по кадрам."""
+
+import math
+from collections import OrderedDict
+
+from physics import BOUNCE, GOAL, Bullet
+
+
+class _Path:
+    """Траектория одного прицела: точки отскоков и пробная пуля, которая её досчитывает."""
+
+    __slots__ = ("probe", "points", "bounces", "steps", "goal", "done")
+
+    def __init__(self, probe, x, y):
+        self.probe = probe
+        self.points = [(x, y)]
+        self.bounces = 0
+        self.steps = 0
+        self.goal = False
+        self.done = False
+
+
+class TrajectoryPreview:
+    """
+    Путь пули из старта через max_bounces отскоков.
+    Пробная пуля шагает той же Simulation.step, что и настоящая в on_update,
+    только направление квантуется по углу (angle_step, радианы).
+    Пути кэшируются по (старт, квант угла), старые выбрасываются (LRU).
+    За один вызов path() делается не больше steps_per_frame шагов: новый прицел
+    сначала показывает начало пути, а пока курсор стоит — путь дорастает.
+    max_steps - предел шагов на путь (пуля зажата или кружит без отскоков)
+    """
+
+    def __init__(self, sim, speed, max_bounces=24, angle_step=0.002, cache_size=256,
+                 steps_per_frame=120, max_steps=5000):
+        self.sim = sim
+        self.speed = speed
+        self.max_bounces = max_bounces
+        self.angle_step = angle_step
+        self.cache_size = cache_size
+        self.steps_per_frame = steps_per_frame
+        self.max_steps = max_steps
+        self._cache = OrderedDict()
+
+    def path(self, start_x, start_y, target_x, target_y):
+        """
+        Точки пути [(x, y), ...] от старта до последнего посчитанного места
+        и флаг, что путь уже доходит до финиша.
+        """
+        if target_x == start_x and target_y == start_y:
+            return None, False
+        q = round(math.atan2(target_y - start_y, target_x - start_x) / self.angle_step)
+        key = (start_x, start_y, q)
+
+        entry = self._cache.get(key)
+        if entry is None:
+            angle = q * self.angle_step
+            bullet = Bullet(
+                start_x, start_y, math.cos(angle) * self.speed, math.sin(angle) * self.speed
+            )
+            entry = _Path(self.sim.probe(bullet), start_x, start_y)
+            self._cache[key] = entry
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+
+        if not entry.done:
+            self._extend(entry, self.steps_per_frame)
+
+        if entry.done:
+            return entry.points, entry.goal
+        b = entry.probe.bullet
+        return entry.points + [(b.x, b.y)], False
+
+    def _extend(self, entry, budget):
+        probe = entry.probe
+        points = entry.points
+        for _ in range(budget):
+            entry.steps += 1
+            for event in probe.step():
+                if event.kind == BOUNCE:
+                    entry.bounces += 1
+                    points.append((event.x, event.y))
+                elif event.kind == GOAL:
+                    entry.goal = True
+                    points.append((event.x, event.y))
+            if (
+                probe.bullet is None
+                or entry.bounces >= self.max_bounces
+                or entry.steps >= self.max_steps
+            ):
+                if probe.bullet is not None and entry.bounces < self.max_bounces:
+                    points.append((probe.bullet.x, probe.bullet.y))
+                entry.done = True
+                # пробная пуля больше не нужна
+                entry.probe = None
+                return
+
+    def clear(self):
+        self._cache.clear()